@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Count
 
 from .models import Artwork, Image
 
@@ -18,13 +19,22 @@ class ArtworkAdmin(admin.ModelAdmin):
         "height_inches",
         "price_cents",
         "status",
+        "image_count",
     ]
     list_filter = ["status", "created_at", "medium", "category"]
     search_fields = ["title"]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(image_count=Count("images"))
+
+    @admin.display(description="Images", ordering="image_count")
+    def image_count(self, obj):
+        return obj.image_count
+
 
 class ImageAdmin(admin.ModelAdmin):
     list_display = ["__str__", "artwork", "is_main_image", "uploaded_at"]
+    list_select_related = ["artwork"]
 
 
 admin.site.register(Artwork, ArtworkAdmin)
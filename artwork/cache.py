@@ -0,0 +1,158 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from .models import Artwork, Image
+
+VERSION_KEY = "artwork:catalogue:version"
+CHANGED_AT_KEY = "artwork:catalogue:changed_at"
+HITS_KEY = "artwork:cache:hits"
+MISSES_KEY = "artwork:cache:misses"
+
+RESPONSE_TIMEOUT = 60 * 60
+
+
+def _increment(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        return cache.incr(key)
+
+
+def get_catalogue_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock rather than 1 so that if the counter is evicted it
+        # can't come back at a value older cached responses were stored under.
+        cache.add(VERSION_KEY, time.time_ns() // 1000, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_catalogue_version():
+    # Imported here because snapshots render through the views, which use this
+    # module.
+    from .snapshots import schedule_snapshot
+
+    cache.set(CHANGED_AT_KEY, time.time(), timeout=None)
+    schedule_snapshot()
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        return get_catalogue_version()
+
+
+def get_cache_stats():
+    return {
+        "version": get_catalogue_version(),
+        "hits": cache.get(HITS_KEY, 0),
+        "misses": cache.get(MISSES_KEY, 0),
+    }
+
+
+def _request_fingerprint(request):
+    params = sorted(
+        (key, sorted(values)) for key, values in request.query_params.lists()
+    )
+    return f"{request.scheme}://{request.get_host()}{request.path}?{params}"
+
+
+def get_catalogue_state():
+    """
+    Cheap summary of the catalogue used to build ETag/Last-Modified headers.
+
+    Stored per catalogue version, so a conditional request that ends in a 304
+    doesn't touch the database at all.
+    """
+    version = get_catalogue_version()
+    key = f"artwork:catalogue:state:{version}"
+    state = cache.get(key)
+    if state is None:
+        artworks = Artwork.objects.aggregate(
+            count=Count("id"), created=Max("created_at"), sold=Max("sold_at")
+        )
+        images = Image.objects.aggregate(count=Count("id"), uploaded=Max("uploaded_at"))
+        timestamps = [
+            value.timestamp()
+            for value in (artworks["created"], artworks["sold"], images["uploaded"])
+            if value is not None
+        ]
+        changed_at = cache.get(CHANGED_AT_KEY)
+        if changed_at is not None:
+            timestamps.append(changed_at)
+        state = {
+            "version": version,
+            "artworks": artworks["count"],
+            "images": images["count"],
+            "last_modified": max(timestamps, default=0),
+        }
+        cache.set(key, state, RESPONSE_TIMEOUT)
+    return state
+
+
+def response_cache_key(request):
+    # Absolute URLs are built from the request, so the host is part of the key.
+    digest = hashlib.sha256(_request_fingerprint(request).encode()).hexdigest()
+    return f"artwork:response:{get_catalogue_version()}:{digest}"
+
+
+class CachedResponseMixin:
+    """Serve list/retrieve responses from the cache until the catalogue changes."""
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            _increment(HITS_KEY)
+            return Response(data)
+
+        _increment(MISSES_KEY)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, RESPONSE_TIMEOUT)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+
+class ConditionalGetMixin:
+    """
+    Add strong ETag and Last-Modified headers to list/retrieve responses and
+    answer If-None-Match/If-Modified-Since with a 304 before the queryset is
+    evaluated.
+    """
+
+    def get_validators(self, request):
+        state = get_catalogue_state()
+        raw = f"{_request_fingerprint(request)}:{sorted(state.items())}"
+        etag = quote_etag(hashlib.sha256(raw.encode()).hexdigest()[:32])
+        return etag, int(state["last_modified"])
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
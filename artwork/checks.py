@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core import checks
+
+# Backends whose entries only exist inside the process that wrote them
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    The catalogue version and the cached responses are shared through the
+    default cache. With a process-local backend a bump made by one gunicorn
+    worker or by the process_stripe_events worker never reaches the others,
+    so they keep serving sold artworks as available.
+    """
+    backend = settings.CACHES.get("default", {}).get("BACKEND")
+    if settings.DEBUG or backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        checks.Error(
+            f"The default cache ({backend}) is not shared between processes.",
+            hint="Set CACHE_URL to a shared cache, e.g. redis://127.0.0.1:6379/0.",
+            id="artwork.E001",
+        )
+    ]
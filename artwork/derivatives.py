@@ -0,0 +1,129 @@
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image as PILImage, ImageOps
+
+from .models import Image, ImageDerivative
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_WIDTHS = (320, 640, 1280, 1920)
+THUMBNAIL_WIDTH = 640
+
+FORMAT_SAVE_OPTIONS = {
+    "avif": ("AVIF", {"quality": 60}),
+    "webp": ("WEBP", {"quality": 80, "method": 6}),
+}
+
+# Derivatives are generated off the request thread. One worker keeps a burst of
+# uploads from competing with gunicorn for CPU.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="derivatives")
+
+
+def available_formats():
+    PILImage.init()
+    return [
+        format
+        for format, (pil_format, _) in FORMAT_SAVE_OPTIONS.items()
+        if pil_format in PILImage.SAVE
+    ]
+
+
+def target_widths(original_width):
+    return [width for width in DERIVATIVE_WIDTHS if width < original_width]
+
+
+def is_up_to_date(image):
+    expected = {
+        (format, width)
+        for format in available_formats()
+        for width in target_widths(image.width or 0)
+    }
+    existing = {
+        (derivative.format, derivative.width)
+        for derivative in image.derivatives.all()
+        if derivative.source == image.image.name
+    }
+    return expected == existing
+
+
+def generate_derivatives(image, force=False):
+    if not image.image:
+        return []
+    if not force and is_up_to_date(image):
+        return list(image.derivatives.all())
+
+    with image.image.open("rb") as file:
+        original = ImageOps.exif_transpose(PILImage.open(file))
+        original.load()
+    if original.mode not in ("RGB", "RGBA"):
+        original = original.convert("RGB")
+
+    stem = os.path.splitext(os.path.basename(image.image.name))[0]
+    created = []
+    try:
+        with transaction.atomic():
+            # The old files are removed by the post_delete signal once this
+            # commits, so a rollback leaves the old rows pointing at them.
+            image.derivatives.all().delete()
+
+            for width in target_widths(original.width):
+                height = round(original.height * width / original.width)
+                resized = original.resize(
+                    (width, height), PILImage.Resampling.LANCZOS
+                )
+
+                for format in available_formats():
+                    pil_format, save_options = FORMAT_SAVE_OPTIONS[format]
+                    buffer = io.BytesIO()
+                    resized.save(buffer, format=pil_format, **save_options)
+
+                    derivative = ImageDerivative(
+                        image=image,
+                        format=format,
+                        width=width,
+                        height=height,
+                        source=image.image.name,
+                    )
+                    derivative.file.save(
+                        f"{stem}_{width}w.{format}",
+                        ContentFile(buffer.getvalue()),
+                        save=False,
+                    )
+                    created.append(derivative)
+                    derivative.save()
+    except Exception:
+        for derivative in created:
+            derivative.file.delete(save=False)
+        raise
+
+    return created
+
+
+def _generate_in_background(image_id):
+    close_old_connections()
+    try:
+        image = Image.objects.prefetch_related("derivatives").get(pk=image_id)
+        generate_derivatives(image)
+    except Image.DoesNotExist:
+        pass
+    except Exception:
+        logger.exception("Failed to generate derivatives for image %s", image_id)
+    finally:
+        close_old_connections()
+
+
+def delete_derivative_file(derivative):
+    """Remove a deleted derivative's file from storage once the delete commits."""
+    if not derivative.file:
+        return
+    storage, name = derivative.file.storage, derivative.file.name
+    transaction.on_commit(lambda: storage.delete(name))
+
+
+def schedule_derivatives(image_id):
+    transaction.on_commit(lambda: _executor.submit(_generate_in_background, image_id))
@@ -0,0 +1,217 @@
+import csv
+import time
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .cache import bump_catalogue_version
+from .models import Artwork
+
+BATCH_SIZE = 500
+
+DEFAULT_STATUS = "unavailable"
+DEFAULT_YEAR = 2024
+
+# Columns validated through the model fields, so choices, max_digits and
+# decimal_places are checked the same way the admin checks them.
+VALIDATED_FIELDS = [
+    "painting_number",
+    "medium",
+    "width_inches",
+    "height_inches",
+    "price_cents",
+    "category",
+]
+
+# Fields an upsert overwrites. Status and year are left alone because they are
+# managed in the admin once an artwork exists.
+UPDATE_FIELDS = [
+    "title",
+    "medium",
+    "paper",
+    "width_inches",
+    "height_inches",
+    "price_cents",
+    "category",
+]
+
+
+def clean_boolean(value):
+    """Convert various string representations to boolean"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return value.lower() in ("true", "t", "yes", "y", "1")
+    return bool(value)
+
+
+class ImportSummary:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.failures = []
+        self.elapsed = 0.0
+        self.committed = False
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+def clean_row(row):
+    """
+    Validate a CSV row and return the field values for an Artwork.
+
+    Raises ValidationError with every invalid column.
+    """
+    values = {}
+    errors = {}
+    for name in VALIDATED_FIELDS:
+        field = Artwork._meta.get_field(name)
+        raw = (row.get(name) or "").strip()
+        try:
+            values[name] = field.clean(raw or None, None)
+        except ValidationError as e:
+            errors[name] = e.messages
+
+    title = (row.get("title") or "").strip()
+    try:
+        Artwork._meta.get_field("title").run_validators(title)
+    except ValidationError as e:
+        errors["title"] = e.messages
+
+    if errors:
+        raise ValidationError(errors)
+
+    values["title"] = title
+    values["paper"] = clean_boolean((row.get("paper") or "").strip())
+    return values
+
+
+def read_rows(file, summary):
+    """
+    Stream a CSV file and yield `(line, values)` for every valid row,
+    recording invalid rows on the summary.
+    """
+    seen = {}
+    for row in csv.DictReader(file):
+        summary.rows += 1
+        line = summary.rows + 1
+        try:
+            values = clean_row(row)
+        except ValidationError as e:
+            errors = "; ".join(
+                f"{name}: {' '.join(messages)}"
+                for name, messages in e.message_dict.items()
+            )
+            summary.failures.append((line, row.get("title") or "Unknown", errors))
+            continue
+
+        number = values["painting_number"]
+        if number is not None:
+            if number in seen:
+                summary.failures.append(
+                    (
+                        line,
+                        values["title"],
+                        f"painting_number {number} is repeated from line {seen[number]}",
+                    )
+                )
+                continue
+            seen[number] = line
+
+        yield line, values
+
+
+def _batches(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+class _InvalidRows(Exception):
+    """Rolls back an import that found invalid rows."""
+
+
+def _write_batch(batch, summary, upsert, status, painting_year):
+    numbers = [
+        values["painting_number"]
+        for values in batch
+        if values["painting_number"] is not None
+    ]
+    existing = {}
+    for artwork in Artwork.objects.filter(painting_number__in=numbers):
+        existing.setdefault(artwork.painting_number, []).append(artwork)
+
+    new_artworks = []
+    changed_artworks = []
+    for values in batch:
+        matches = existing.get(values["painting_number"])
+        if not matches:
+            new_artworks.append(
+                Artwork(status=status, painting_year=painting_year, **values)
+            )
+        elif upsert:
+            for artwork in matches:
+                for name in UPDATE_FIELDS:
+                    setattr(artwork, name, values[name])
+                changed_artworks.append(artwork)
+        else:
+            summary.skipped += 1
+
+    Artwork.objects.bulk_create(new_artworks)
+    summary.created += len(new_artworks)
+    if changed_artworks:
+        Artwork.objects.bulk_update(changed_artworks, UPDATE_FIELDS)
+        summary.updated += len(changed_artworks)
+
+
+def import_artworks(
+    file,
+    batch_size=BATCH_SIZE,
+    upsert=False,
+    skip_invalid=False,
+    status=DEFAULT_STATUS,
+    painting_year=DEFAULT_YEAR,
+):
+    """
+    Import artworks from an open CSV file.
+
+    The file is read and written in `batch_size` chunks of rows, in
+    `bulk_create`/`bulk_update` batches inside a single transaction. If any
+    row is invalid, writing stops and the transaction is rolled back unless
+    `skip_invalid` is set. The rest of the file is still validated so that
+    every failure is reported.
+
+    Rows whose painting_number already exists are updated when `upsert` is
+    set and skipped otherwise.
+    """
+    summary = ImportSummary()
+    start = time.perf_counter()
+
+    try:
+        with transaction.atomic():
+            for batch in _batches(
+                (values for _, values in read_rows(file, summary)), batch_size
+            ):
+                if summary.failures and not skip_invalid:
+                    continue
+                _write_batch(batch, summary, upsert, status, painting_year)
+
+            if summary.failures and not skip_invalid:
+                raise _InvalidRows
+
+            # Bulk writes skip the model signals that invalidate cached responses.
+            if summary.created or summary.updated:
+                transaction.on_commit(bump_catalogue_version)
+    except _InvalidRows:
+        summary.created = summary.updated = summary.skipped = 0
+        summary.elapsed = time.perf_counter() - start
+        return summary
+
+    summary.committed = True
+    summary.elapsed = time.perf_counter() - start
+    return summary
@@ -0,0 +1,218 @@
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files import File
+from django.db import transaction
+from PIL import Image as PILImage, UnidentifiedImageError
+
+from .cache import bump_catalogue_version
+from .derivatives import schedule_derivatives
+from .main_images import update_main_images
+from .models import Artwork, Image
+
+BATCH_SIZE = 200
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".tif", ".tiff"}
+
+# Files are named after the painting number, optionally followed by a suffix
+# for additional photos: "123.jpg", "123-detail.jpg", "123_2.jpg".
+FILENAME_PATTERN = re.compile(r"^(\d+)(?:[-_ ].*)?$")
+
+
+def painting_number_from_filename(filename):
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    match = FILENAME_PATTERN.match(stem)
+    return int(match.group(1)) if match else None
+
+
+def is_main_candidate(filename):
+    """A file named exactly after the painting number is its main image."""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    return stem.isdigit()
+
+
+def inspect_image(path):
+    """
+    Fully decode an image file and return `(path, width, height, error)`.
+
+    Runs in worker processes, so it only uses Pillow and must not touch Django.
+    """
+    try:
+        with PILImage.open(path) as image:
+            image.verify()
+        # verify() leaves the image unusable and doesn't decode pixel data, so
+        # open it again to catch truncated files.
+        with PILImage.open(path) as image:
+            image.load()
+            width, height = image.size
+    except (
+        OSError,
+        UnidentifiedImageError,
+        PILImage.DecompressionBombError,
+        SyntaxError,
+        ValueError,
+    ) as e:
+        return path, None, None, str(e) or e.__class__.__name__
+    return path, width, height, None
+
+
+class IngestSummary:
+    def __init__(self):
+        self.files = 0
+        self.created = 0
+        self.main_images = 0
+        self.failures = []
+        self.elapsed = 0.0
+
+    @property
+    def files_per_second(self):
+        return self.files / self.elapsed if self.elapsed else 0.0
+
+
+def find_image_files(directory):
+    paths = []
+    for entry in sorted(os.scandir(directory), key=lambda x: x.name):
+        extension = os.path.splitext(entry.name)[1].lower()
+        if entry.is_file() and extension in IMAGE_EXTENSIONS:
+            paths.append(entry.path)
+    return paths
+
+
+def _inspect_all(paths, workers):
+    if workers == 1:
+        return list(map(inspect_image, paths))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(inspect_image, paths, chunksize=8))
+
+
+def _match_artworks(paths, summary):
+    """Map each path to an artwork id by painting number, recording misses."""
+    numbers = {path: painting_number_from_filename(path) for path in paths}
+    artworks = {}
+    for pk, number in Artwork.objects.filter(
+        painting_number__in={n for n in numbers.values() if n is not None}
+    ).values_list("pk", "painting_number"):
+        if number in artworks:
+            artworks[number] = None  # ambiguous, reported below
+        else:
+            artworks[number] = pk
+
+    matched = {}
+    for path, number in numbers.items():
+        name = os.path.basename(path)
+        if number is None:
+            summary.failures.append(
+                (name, "filename does not start with a painting number")
+            )
+        elif number not in artworks:
+            summary.failures.append(
+                (name, f"no artwork with painting_number {number}")
+            )
+        elif artworks[number] is None:
+            summary.failures.append(
+                (name, f"several artworks have painting_number {number}")
+            )
+        else:
+            matched[path] = artworks[number]
+    return matched
+
+
+def _choose_main_images(files):
+    """
+    Return the paths to mark as main image: one for every artwork that doesn't
+    have a main image yet, preferring the file named after the painting number.
+    """
+    by_artwork = {}
+    for path, artwork_id in files:
+        by_artwork.setdefault(artwork_id, []).append(path)
+    has_main = set(
+        Image.objects.filter(
+            artwork_id__in=by_artwork, is_main_image=True
+        ).values_list("artwork_id", flat=True)
+    )
+    main_paths = set()
+    for artwork_id, paths in by_artwork.items():
+        if artwork_id not in has_main:
+            main_paths.add(next(filter(is_main_candidate, paths), paths[0]))
+    return main_paths
+
+
+def _store(path, field):
+    with open(path, "rb") as file:
+        name = field.generate_filename(None, os.path.basename(path))
+        return field.storage.save(name, File(file), max_length=field.max_length)
+
+
+def ingest_images(
+    directory, workers=None, batch_size=BATCH_SIZE, generate_derivatives=True
+):
+    """
+    Create Image rows for every image file in `directory`.
+
+    Files are matched to artworks by the painting number at the start of the
+    filename, then decoded and measured in a process pool. Valid files are
+    written to storage and their rows created with `bulk_create` in a single
+    transaction; if that fails the stored files are deleted again.
+    """
+    summary = IngestSummary()
+    start = time.perf_counter()
+
+    paths = find_image_files(directory)
+    summary.files = len(paths)
+    matched = _match_artworks(paths, summary)
+
+    files = []
+    dimensions = {}
+    for path, width, height, error in _inspect_all(list(matched), workers):
+        if error:
+            summary.failures.append((os.path.basename(path), error))
+            continue
+        files.append((path, matched[path]))
+        dimensions[path] = (width, height)
+
+    if not files:
+        summary.elapsed = time.perf_counter() - start
+        return summary
+
+    main_paths = _choose_main_images(files)
+
+    field = Image._meta.get_field("image")
+    stored = []
+    try:
+        images = []
+        for path, artwork_id in files:
+            name = _store(path, field)
+            stored.append(name)
+            width, height = dimensions[path]
+            # Passing the dimensions with the name keeps the ImageField from
+            # opening the stored file again to fill width_field/height_field.
+            images.append(
+                Image(
+                    artwork_id=artwork_id,
+                    image=name,
+                    width=width,
+                    height=height,
+                    is_main_image=path in main_paths,
+                )
+            )
+
+        with transaction.atomic():
+            created = Image.objects.bulk_create(images, batch_size=batch_size)
+            # bulk_create skips the signals that maintain the main image
+            # pointer, generate derivatives and invalidate cached responses.
+            update_main_images({image.artwork_id for image in created})
+            if generate_derivatives:
+                for image in created:
+                    schedule_derivatives(image.pk)
+            transaction.on_commit(bump_catalogue_version)
+    except Exception:
+        for name in stored:
+            field.storage.delete(name)
+        raise
+
+    summary.created = len(created)
+    summary.main_images = len(main_paths)
+    summary.elapsed = time.perf_counter() - start
+    return summary
@@ -0,0 +1,48 @@
+from .models import Artwork, Image
+
+MAIN_IMAGE_FIELDS = ["main_image", "main_image_width", "main_image_height"]
+
+
+def clear_other_main_images(image):
+    """Unset is_main_image on the artwork's other images."""
+    others = Image.objects.filter(artwork_id=image.artwork_id, is_main_image=True)
+    if image.pk is not None:
+        others = others.exclude(pk=image.pk)
+    others.update(is_main_image=False)
+
+
+def update_main_images(artwork_ids):
+    """
+    Recompute the denormalized main image pointer and dimensions on artworks.
+
+    The pointer follows Artwork.get_main_image: the image marked as main, or the
+    oldest image if none is. Runs one SELECT and one UPDATE however many
+    artworks are given, so bulk writes that skip signals can call it once.
+    Returns the updated (unsaved) artwork instances.
+    """
+    artwork_ids = set(artwork_ids)
+    if not artwork_ids:
+        return []
+
+    chosen = {}
+    rows = (
+        Image.objects.filter(artwork_id__in=artwork_ids)
+        .order_by("artwork_id", "-is_main_image", "id")
+        .values_list("artwork_id", "id", "width", "height")
+    )
+    for artwork_id, pk, width, height in rows:
+        chosen.setdefault(artwork_id, (pk, width, height))
+
+    artworks = []
+    for artwork_id in artwork_ids:
+        pk, width, height = chosen.get(artwork_id, (None, None, None))
+        artworks.append(
+            Artwork(
+                pk=artwork_id,
+                main_image_id=pk,
+                main_image_width=width,
+                main_image_height=height,
+            )
+        )
+    Artwork.objects.bulk_update(artworks, MAIN_IMAGE_FIELDS)
+    return artworks
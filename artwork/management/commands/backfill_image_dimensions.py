@@ -0,0 +1,56 @@
+from django.core.files.images import get_image_dimensions
+from django.core.management.base import BaseCommand
+
+from artwork.models import Image
+
+
+class Command(BaseCommand):
+    help = "Store width/height for images that don't have their dimensions saved yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-read dimensions for every image, not only missing ones",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        images = Image.objects.exclude(image="")
+        if not options["all"]:
+            images = images.filter(width__isnull=True)
+
+        updated = 0
+        failed = 0
+        batch = []
+        rows = images.values_list("pk", "image").order_by("pk")
+        for pk, name in rows.iterator(chunk_size=batch_size):
+            try:
+                with Image._meta.get_field("image").storage.open(name) as file:
+                    width, height = get_image_dimensions(file)
+            except (OSError, ValueError) as e:
+                failed += 1
+                self.stderr.write(f"✗ Image {pk} ({name}): {e}")
+                continue
+            if width is None or height is None:
+                failed += 1
+                self.stderr.write(f"✗ Image {pk} ({name}): unreadable image")
+                continue
+
+            batch.append(Image(pk=pk, width=width, height=height))
+            if len(batch) >= batch_size:
+                Image.objects.bulk_update(batch, ["width", "height"])
+                updated += len(batch)
+                batch = []
+
+        if batch:
+            Image.objects.bulk_update(batch, ["width", "height"])
+            updated += len(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Updated dimensions for {updated} images")
+        )
+        if failed:
+            self.stdout.write(self.style.WARNING(f"Failed to read {failed} images"))
@@ -0,0 +1,192 @@
+import json
+import platform
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+import django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, RequestFactory, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from artwork.models import Artwork
+from artwork.serializers import (
+    ARTWORK_LIST_VALUES,
+    ArtworkListSerializer,
+    ArtworkSerializer,
+)
+from payments.events import process_pending_events
+from payments.models import ArtworkHold, StripeEvent
+from payments.views import webhook_secret
+from utils.benchmark import (
+    fake_checkout_event,
+    measure,
+    seed_catalogue,
+    sign_webhook_payload,
+)
+
+BENCHMARK_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "benchmark",
+    }
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic catalogue in a throwaway test database and benchmark "
+        "the public API, checkout and webhook hot paths, printing JSON results"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--artworks", type=int, default=300)
+        parser.add_argument("--images-per-artwork", type=int, default=3)
+        parser.add_argument("--orders", type=int, default=30)
+        parser.add_argument("--shipments-per-order", type=int, default=1)
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument(
+            "--no-memory",
+            action="store_true",
+            help="Skip tracemalloc, which inflates latencies",
+        )
+        parser.add_argument("--output", help="Write the JSON results to this file")
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        setup_test_environment()
+        try:
+            results = self.benchmark(options)
+        finally:
+            teardown_test_environment()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output + "\n")
+        self.stdout.write(output)
+
+    def benchmark(self, options):
+        # create_test_db only swaps the database. The scenarios clear the cache
+        # and seeding bumps the catalogue version, so keep them off the
+        # configured (possibly shared) cache and media storage as well.
+        with override_settings(CACHES=BENCHMARK_CACHES, MEDIA_ROOT=tempfile.mkdtemp()):
+            return self.run_benchmarks(options)
+
+    def run_benchmarks(self, options):
+        sizes = {
+            "artworks": options["artworks"],
+            "images_per_artwork": options["images_per_artwork"],
+            "orders": options["orders"],
+            "shipments_per_order": options["shipments_per_order"],
+        }
+        artworks = seed_catalogue(**sizes)
+        detail_id = next(a.id for a in artworks if a.status == "available")
+
+        def run(func, **kwargs):
+            return measure(
+                func,
+                iterations=options["iterations"],
+                trace_memory=not options["no_memory"],
+                **kwargs,
+            )
+
+        client = Client()
+        results = {
+            "artwork_list": run(
+                lambda: client.get("/api/artworks/"), setup=cache.clear
+            ),
+            "artwork_list_cached": run(lambda: client.get("/api/artworks/")),
+            "artwork_detail": run(
+                lambda: client.get(f"/api/artworks/{detail_id}/"), setup=cache.clear
+            ),
+            "image_list": run(lambda: client.get("/api/images/"), setup=cache.clear),
+        }
+
+        # The list serializers on their own, over the same public artworks, to
+        # compare the CPU cost of ModelSerializer with the row-based cards.
+        public = Artwork.objects.filter(
+            status__in=["available", "coming_soon", "sold", "not_for_sale"]
+        )
+        context = {
+            "request": RequestFactory().get("/api/artworks/"),
+            "view": SimpleNamespace(action="list"),
+        }
+        results["artwork_list_model_serializer"] = run(
+            lambda: ArtworkSerializer(
+                public.select_related("main_image").prefetch_related(
+                    "main_image__derivatives"
+                ),
+                many=True,
+                context=context,
+            ).data
+        )
+        results["artwork_list_serializer"] = run(
+            lambda: ArtworkListSerializer(
+                public.values(*ARTWORK_LIST_VALUES), many=True, context=context
+            ).data
+        )
+
+        # Checkout with Stripe stubbed out; holds are cleared between runs so
+        # the same artwork stays available.
+        stub_session = SimpleNamespace(id="cs_stub", url="https://checkout.test")
+        with mock.patch("stripe.checkout.Session.create", return_value=stub_session):
+            results["checkout"] = run(
+                lambda: client.post(
+                    "/api/create-checkout-session/",
+                    {"product_ids": [str(detail_id)]},
+                    content_type="application/json",
+                ),
+                setup=cache.clear,
+                teardown=lambda: ArtworkHold.objects.all().delete(),
+            )
+
+        def post_event():
+            payload = fake_checkout_event([detail_id])
+            client.post(
+                "/api/stripe-webhook/",
+                payload,
+                content_type="application/json",
+                HTTP_STRIPE_SIGNATURE=sign_webhook_payload(payload, webhook_secret),
+            )
+
+        results["stripe_webhook"] = run(post_event)
+        StripeEvent.objects.all().delete()
+
+        def reset_sale():
+            Artwork.objects.filter(id=detail_id).update(
+                status="available", order=None, sold_at=None
+            )
+
+        results["stripe_event_processing"] = run(
+            process_pending_events, setup=post_event, teardown=reset_sale
+        )
+
+        return {
+            "meta": {
+                "commit": self.git_commit(),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                **sizes,
+            },
+            "results": results,
+        }
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "HEAD"],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,53 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from artwork.snapshots import ENCODINGS, KEEP_VERSIONS, export_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the public artwork list and details into precompressed JSON "
+        "files under STATIC_ROOT/catalogue/ for nginx to serve"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--base-url",
+            default=None,
+            help="Origin used for absolute image URLs (defaults to BASE_URL)",
+        )
+        parser.add_argument(
+            "--keep",
+            type=int,
+            default=KEEP_VERSIONS,
+            help="Number of snapshot versions to keep",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Rewrite every file even if the catalogue hasn't changed",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            summary = export_snapshot(
+                base_url=options["base_url"],
+                force=options["force"],
+                keep=options["keep"],
+            )
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+
+        if not summary.changed:
+            self.stdout.write(f"Catalogue snapshot {summary.version} is up to date")
+            return
+
+        encodings = ", ".join(ENCODINGS)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Exported catalogue snapshot {summary.version} with "
+                f"{summary.artworks} artworks in {summary.elapsed:.2f}s: "
+                f"{summary.written} files written ({encodings}), "
+                f"{summary.reused} reused"
+            )
+        )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from artwork.derivatives import available_formats, generate_derivatives
+from artwork.models import Image
+
+
+class Command(BaseCommand):
+    help = "Generate resized WebP/AVIF derivatives for artwork images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate derivatives even if they are up to date",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Formats: {', '.join(available_formats())}")
+
+        generated = 0
+        failed = 0
+        images = Image.objects.exclude(image="").prefetch_related("derivatives")
+        for image in images.order_by("pk").iterator(chunk_size=100):
+            try:
+                derivatives = generate_derivatives(image, force=options["force"])
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"✗ Image {image.pk} ({image.image.name}): {e}")
+                continue
+            generated += len(derivatives)
+
+        self.stdout.write(self.style.SUCCESS(f"{generated} derivatives are up to date"))
+        if failed:
+            self.stdout.write(self.style.WARNING(f"Failed to process {failed} images"))
@@ -0,0 +1,52 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from artwork.ingestion import BATCH_SIZE, ingest_images
+
+
+class Command(BaseCommand):
+    help = (
+        "Create images for every file in a directory, matching files to artworks "
+        "by the painting number at the start of the filename (e.g. 123.jpg, "
+        "123-detail.jpg)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Directory containing the image files")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Processes used to decode images (defaults to the CPU count)",
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            "--skip-derivatives",
+            action="store_true",
+            help="Don't generate WebP/AVIF derivatives; run "
+            "generate_image_derivatives later instead",
+        )
+
+    def handle(self, *args, **options):
+        if not os.path.isdir(options["directory"]):
+            raise CommandError(f"{options['directory']} is not a directory")
+
+        summary = ingest_images(
+            options["directory"],
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            generate_derivatives=not options["skip_derivatives"],
+        )
+
+        for name, error in summary.failures:
+            self.stderr.write(f"✗ {name}: {error}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Processed {summary.files} files in {summary.elapsed:.2f}s "
+                f"({summary.files_per_second:.0f} files/s): {summary.created} "
+                f"images created, {summary.main_images} main images, "
+                f"{len(summary.failures)} failed"
+            )
+        )
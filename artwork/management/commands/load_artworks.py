@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from artwork.importers import BATCH_SIZE, DEFAULT_STATUS, DEFAULT_YEAR, import_artworks
+from artwork.models import Artwork
+
+
+class Command(BaseCommand):
+    help = (
+        "Import artworks from a CSV file with columns painting_number, title, "
+        "medium, paper, width_inches, height_inches, price_cents, category"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path", help="Path to CSV file")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            "--upsert",
+            action="store_true",
+            help="Update artworks whose painting_number already exists",
+        )
+        parser.add_argument(
+            "--skip-invalid",
+            action="store_true",
+            help="Import the valid rows even if some rows fail validation",
+        )
+        parser.add_argument(
+            "--status",
+            default=DEFAULT_STATUS,
+            choices=[value for value, _ in Artwork.STATUS_CHOICES],
+            help="Status for newly created artworks",
+        )
+        parser.add_argument(
+            "--year",
+            type=int,
+            default=DEFAULT_YEAR,
+            help="Painting year for newly created artworks",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["csv_path"], newline="") as file:
+                summary = import_artworks(
+                    file,
+                    batch_size=options["batch_size"],
+                    upsert=options["upsert"],
+                    skip_invalid=options["skip_invalid"],
+                    status=options["status"],
+                    painting_year=options["year"],
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for line, title, error in summary.failures:
+            self.stderr.write(f"✗ Line {line} ({title}): {error}")
+
+        if not summary.committed:
+            raise CommandError(
+                f"{len(summary.failures)} of {summary.rows} rows are invalid, "
+                "nothing was imported. Use --skip-invalid to import the rest."
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {summary.rows} rows in {summary.elapsed:.2f}s "
+                f"({summary.rows_per_second:.0f} rows/s): {summary.created} created, "
+                f"{summary.updated} updated, {summary.skipped} skipped, "
+                f"{len(summary.failures)} failed"
+            )
+        )
@@ -0,0 +1,64 @@
+# Generated by Django 5.1.3 on 2026-10-17 16:07
+
+from django.core.files.images import get_image_dimensions
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def backfill_image_dimensions(apps, schema_editor):
+    Image = apps.get_model("artwork", "Image")
+
+    # Read only the stored file names so instantiating rows doesn't trigger
+    # ImageField's own dimension lookup for every image.
+    rows = (
+        Image.objects.filter(width__isnull=True)
+        .exclude(image="")
+        .values_list("pk", "image")
+        .order_by("pk")
+    )
+    batch = []
+    for pk, name in rows.iterator(chunk_size=BATCH_SIZE):
+        try:
+            with default_storage.open(name) as file:
+                width, height = get_image_dimensions(file)
+        except (OSError, ValueError):
+            continue
+        if width is None or height is None:
+            continue
+        batch.append(Image(pk=pk, width=width, height=height))
+        if len(batch) >= BATCH_SIZE:
+            Image.objects.bulk_update(batch, ["width", "height"])
+            batch = []
+    if batch:
+        Image.objects.bulk_update(batch, ["width", "height"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("artwork", "0020_alter_artwork_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="image",
+            name="height",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="image",
+            name="width",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name="image",
+            name="image",
+            field=models.ImageField(
+                height_field="height", upload_to="artwork/", width_field="width"
+            ),
+        ),
+        migrations.RunPython(
+            backfill_image_dimensions, reverse_code=migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.3 on 2026-10-17 16:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("artwork", "0021_image_height_image_width"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImageDerivative",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "format",
+                    models.CharField(
+                        choices=[("avif", "AVIF"), ("webp", "WebP")], max_length=10
+                    ),
+                ),
+                ("file", models.ImageField(upload_to="artwork/derivatives/")),
+                ("width", models.PositiveIntegerField()),
+                ("height", models.PositiveIntegerField()),
+                ("source", models.CharField(max_length=255)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "image",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="derivatives",
+                        to="artwork.image",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["format", "width"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("image", "format", "width"),
+                        name="unique_image_derivative",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.3 on 2026-10-17 16:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("artwork", "0022_imagederivative"),
+        ("orders", "0002_remove_order_session_id_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="artwork",
+            index=models.Index(
+                fields=["sort_order", "id"], name="artwork_sort_order_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="image",
+            index=models.Index(
+                fields=["uploaded_at", "id"], name="image_uploaded_at_id_idx"
+            ),
+        ),
+    ]
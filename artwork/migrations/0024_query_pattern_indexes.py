@@ -0,0 +1,35 @@
+# Generated by Django 5.1.3 on 2026-10-17 16:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("artwork", "0023_keyset_pagination_indexes"),
+        ("orders", "0002_remove_order_session_id_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="artwork",
+            index=models.Index(
+                fields=["status", "sort_order"], name="artwork_status_sort_order_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="artwork",
+            index=models.Index(
+                condition=models.Q(("shipment__isnull", True)),
+                fields=["order"],
+                name="artwork_unshipped_order_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="image",
+            index=models.Index(
+                condition=models.Q(("is_main_image", True)),
+                fields=["artwork"],
+                name="image_main_image_idx",
+            ),
+        ),
+    ]
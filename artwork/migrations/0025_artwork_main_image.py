@@ -0,0 +1,78 @@
+# Generated by Django 5.1.3 on 2026-10-17 16:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def backfill_main_images(apps, schema_editor):
+    Artwork = apps.get_model("artwork", "Artwork")
+    Image = apps.get_model("artwork", "Image")
+
+    # Walk every image main-first per artwork; the first one seen is the main
+    # image and any later image still marked as main is unmarked.
+    chosen = {}
+    demoted = []
+    rows = Image.objects.order_by("artwork_id", "-is_main_image", "id").values_list(
+        "artwork_id", "id", "width", "height", "is_main_image"
+    )
+    for artwork_id, pk, width, height, is_main_image in rows.iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        if artwork_id not in chosen:
+            chosen[artwork_id] = (pk, width, height)
+        elif is_main_image:
+            demoted.append(pk)
+
+    if demoted:
+        Image.objects.filter(pk__in=demoted).update(is_main_image=False)
+
+    artworks = [
+        Artwork(
+            pk=artwork_id,
+            main_image_id=pk,
+            main_image_width=width,
+            main_image_height=height,
+        )
+        for artwork_id, (pk, width, height) in chosen.items()
+    ]
+    Artwork.objects.bulk_update(
+        artworks,
+        ["main_image", "main_image_width", "main_image_height"],
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("artwork", "0024_query_pattern_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="artwork",
+            name="main_image",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="artwork.image",
+            ),
+        ),
+        migrations.AddField(
+            model_name="artwork",
+            name="main_image_height",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="artwork",
+            name="main_image_width",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(
+            backfill_main_images, reverse_code=migrations.RunPython.noop
+        ),
+    ]
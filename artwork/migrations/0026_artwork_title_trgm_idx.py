@@ -0,0 +1,26 @@
+# Generated by Django 5.1.3 on 2026-10-17 16:40
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("artwork", "0025_artwork_main_image"),
+        # Creates the pg_trgm extension
+        ("orders", "0004_admin_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="artwork",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("title"),
+                    name="gin_trgm_ops",
+                ),
+                name="artwork_title_trgm_idx",
+            ),
+        ),
+    ]
@@ -1,10 +1,34 @@
 import uuid
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models import Exists
+from django.db.models.functions import Upper
 from django.core.exceptions import ValidationError
 
 from orders.models import Order, Shipment
 
 
+SHIPMENT_ORDER_ERROR = "Artwork can only be assigned to shipments from the same order"
+
+
+class ArtworkQuerySet(models.QuerySet):
+    def assign_to_shipment(self, shipment, artworks):
+        """
+        Assign `artworks` (instances or primary keys) to `shipment` in one
+        UPDATE that only applies if every artwork belongs to the shipment's
+        order. Raises ValidationError otherwise.
+        """
+        artwork_ids = {getattr(artwork, "pk", artwork) for artwork in artworks}
+        if not artwork_ids:
+            return 0
+        selected = self.filter(pk__in=artwork_ids)
+        mismatched = selected.exclude(order_id=shipment.order_id)
+        updated = selected.filter(~Exists(mismatched)).update(shipment=shipment)
+        if updated != len(artwork_ids):
+            raise ValidationError(SHIPMENT_ORDER_ERROR)
+        return updated
+
+
 class Artwork(models.Model):
     STATUS_CHOICES = [
         ("sold", "Sold"),
@@ -16,7 +40,7 @@ class Artwork(models.Model):
 
     MEDIUM_CHOICES = [
         ("oil_panel", "Oil on Panel"),
-        ("acrylic_panel", "Acrylic on Panel"), 
+        ("acrylic_panel", "Acrylic on Panel"),
         ("oil_mdf", "Oil on MDF"),
         ("oil_paper", "Oil on Oil Paper"),
         ("unknown", "Unknown"),
@@ -53,39 +77,152 @@ class Artwork(models.Model):
         related_name="artworks",
     )
 
+    # Denormalized from Image by artwork.main_images, so list rendering needs
+    # neither the images nor any logic to pick the main one.
+    main_image = models.ForeignKey(
+        "Image",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="+",
+    )
+    main_image_width = models.PositiveIntegerField(
+        null=True, blank=True, editable=False
+    )
+    main_image_height = models.PositiveIntegerField(
+        null=True, blank=True, editable=False
+    )
+
     sort_order = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     sold_at = models.DateTimeField(null=True, blank=True)
 
+    objects = ArtworkQuerySet.as_manager()
+
     class Meta:
         ordering = ["sort_order"]
+        indexes = [
+            models.Index(fields=["sort_order", "id"], name="artwork_sort_order_id_idx"),
+            models.Index(
+                fields=["status", "sort_order"], name="artwork_status_sort_order_idx"
+            ),
+            models.Index(
+                fields=["order"],
+                condition=models.Q(shipment__isnull=True),
+                name="artwork_unshipped_order_idx",
+            ),
+            # Backs the admin's title search (icontains compares UPPER(title))
+            GinIndex(
+                OpClass(Upper("title"), name="gin_trgm_ops"),
+                name="artwork_title_trgm_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
-    def save(self, *args, **kwargs):
-        if self.shipment and self.order != self.shipment.order:
-            raise ValidationError(
-                "Artwork can only be assigned to shipments from the same order"
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_assignment = instance._current_assignment()
+        return instance
+
+    def _current_assignment(self):
+        # Read from __dict__ so deferred fields aren't loaded just for this
+        return (self.__dict__.get("order_id"), self.__dict__.get("shipment_id"))
+
+    def check_shipment_order(self):
+        """
+        Check the shipment belongs to the artwork's order without loading the
+        shipment: skipped when the assignment is unchanged since it was loaded
+        or saved, read from an already fetched shipment, or else a single
+        order_id lookup.
+        """
+        if self.shipment_id is None:
+            return
+        if getattr(self, "_saved_assignment", None) == self._current_assignment():
+            return
+        if Artwork.shipment.is_cached(self):
+            shipment_order_id = self.shipment.order_id
+        else:
+            shipment_order_id = (
+                Shipment.objects.filter(pk=self.shipment_id)
+                .values_list("order_id", flat=True)
+                .first()
             )
+        if shipment_order_id != self.order_id:
+            raise ValidationError(SHIPMENT_ORDER_ERROR)
+
+    def save(self, *args, **kwargs):
+        self.check_shipment_order()
         super().save(*args, **kwargs)
+        self._saved_assignment = self._current_assignment()
+
+    def get_main_image(self):
+        # Uses the prefetched images when available, so callers that prefetch
+        # `images` (see ArtworkViewSet.get_queryset) don't issue extra queries.
+        images = sorted(self.images.all(), key=lambda x: (not x.is_main_image, x.pk))
+        return images[0] if images else None
 
     def get_image_dimensions(self):
-        main_images = self.images.filter(is_main_image=True)
-        if main_images.exists():
-            return (main_images.first().image.width, main_images.first().image.height)
-        elif self.images.exists():
-            return (self.images.first().image.width, self.images.first().image.height)
-        return None
+        if self.main_image_width is None or self.main_image_height is None:
+            return None
+        return (self.main_image_width, self.main_image_height)
 
 
 class Image(models.Model):
     artwork = models.ForeignKey(
         Artwork, related_name="images", on_delete=models.CASCADE
     )
-    image = models.ImageField(upload_to="artwork/")
+    image = models.ImageField(
+        upload_to="artwork/", width_field="width", height_field="height"
+    )
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False)
     is_main_image = models.BooleanField(default=False)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["uploaded_at", "id"], name="image_uploaded_at_id_idx"),
+            models.Index(
+                fields=["artwork"],
+                condition=models.Q(is_main_image=True),
+                name="image_main_image_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"Image for {self.artwork.title}"
+
+
+class ImageDerivative(models.Model):
+    FORMAT_CHOICES = [
+        ("avif", "AVIF"),
+        ("webp", "WebP"),
+    ]
+
+    image = models.ForeignKey(
+        Image, related_name="derivatives", on_delete=models.CASCADE
+    )
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    file = models.ImageField(upload_to="artwork/derivatives/")
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    # Name of the original file this was generated from, so regenerating can
+    # tell whether the derivative is stale after the upload is replaced.
+    source = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["format", "width"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["image", "format", "width"],
+                name="unique_image_derivative",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.width}w {self.format} for image {self.image_id}"
@@ -0,0 +1,126 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a unique `(field, tiebreaker)` ordering.
+
+    The cursor encodes the last row's values so each page is a range scan on
+    the matching index, no matter how deep the client has paged. Pagination is
+    opt-in: requests without `cursor` or `page_size` get the full list, which
+    keeps existing clients working.
+    """
+
+    ordering = None
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (
+            self.cursor_query_param not in request.query_params
+            and self.page_size_query_param not in request.query_params
+        ):
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        field, tiebreaker = self.ordering
+        queryset = queryset.order_by(field, tiebreaker)
+
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            value, tiebreaker_value = position
+            # The redundant `>=` bound lets the planner use the index range.
+            queryset = queryset.filter(**{f"{field}__gte": value}).filter(
+                Q(**{f"{field}__gt": value})
+                | Q(**{field: value, f"{tiebreaker}__gt": tiebreaker_value})
+            )
+
+        results = list(queryset[: self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != 2:
+            raise NotFound(self.invalid_cursor_message)
+        # Cursors come from clients, so each value must be valid for its field
+        # before it reaches the query.
+        try:
+            position = [
+                model._meta.get_field(field_name).to_python(value)
+                for field_name, value in zip(self.ordering, position)
+            ]
+        except (ValidationError, ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def encode_cursor(self, instance):
+        # Pages may hold `.values()` rows as well as model instances
+        if isinstance(instance, dict):
+            position = [instance[field_name] for field_name in self.ordering]
+        else:
+            position = [getattr(instance, field_name) for field_name in self.ordering]
+        raw = json.dumps(position, default=str)
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.page[-1])
+        )
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class ArtworkPagination(KeysetPagination):
+    ordering = ("sort_order", "id")
+
+
+class ImagePagination(KeysetPagination):
+    ordering = ("uploaded_at", "id")
@@ -1,36 +1,81 @@
 from rest_framework import serializers
 
-from .models import Artwork, Image
+from utils.request_metrics import TimedListSerializer, TimedSerializerMixin
+from .derivatives import THUMBNAIL_WIDTH
+from .models import Artwork, Image, ImageDerivative
 
 
-class ImageSerializer(serializers.ModelSerializer):
+class ImageSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    thumbnail = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
 
-    def get_image(self, obj):
+    def build_url(self, file):
         request = self.context.get("request")
-        if request and obj.image:
-            return request.build_absolute_uri(obj.image.url)
+        if request and file:
+            return request.build_absolute_uri(file.url)
         return None
 
+    def get_image(self, obj):
+        return self.build_url(obj.image)
+
+    def get_thumbnail(self, obj):
+        # Smallest derivative that is at least THUMBNAIL_WIDTH wide, preferring
+        # WebP for browser support. Falls back to the original upload until
+        # derivatives have been generated.
+        candidates = [
+            derivative
+            for derivative in obj.derivatives.all()
+            if derivative.format == "webp" and derivative.width >= THUMBNAIL_WIDTH
+        ]
+        if not candidates:
+            return self.get_image(obj)
+        return self.build_url(min(candidates, key=lambda x: x.width).file)
+
+    def get_srcset(self, obj):
+        srcset = {}
+        for derivative in sorted(obj.derivatives.all(), key=lambda x: x.width):
+            url = self.build_url(derivative.file)
+            if url:
+                srcset.setdefault(derivative.format, []).append(
+                    f"{url} {derivative.width}w"
+                )
+        return {format: ", ".join(entries) for format, entries in srcset.items()}
+
     class Meta:
         model = Image
-        fields = ["id", "image", "is_main_image", "uploaded_at"]
+        list_serializer_class = TimedListSerializer
+        fields = [
+            "id",
+            "image",
+            "thumbnail",
+            "srcset",
+            "width",
+            "height",
+            "is_main_image",
+            "uploaded_at",
+        ]
 
 
-class ArtworkSerializer(serializers.ModelSerializer):
+class ArtworkSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     images = serializers.SerializerMethodField()
     image_dimensions = serializers.SerializerMethodField()
 
     def get_images(self, obj):
-        images = obj.images.all()
-        sorted_images = sorted(images, key=lambda x: not x.is_main_image)
-        return ImageSerializer(sorted_images, many=True, context=self.context).data
+        view = self.context.get("view")
+        if view is not None and view.action == "list":
+            images = [obj.main_image] if obj.main_image_id else []
+        else:
+            images = obj.images.all()
+            images = sorted(images, key=lambda x: (not x.is_main_image, x.pk))
+        return ImageSerializer(images, many=True, context=self.context).data
 
     def get_image_dimensions(self, obj):
         return obj.get_image_dimensions()
 
     class Meta:
         model = Artwork
+        list_serializer_class = TimedListSerializer
         fields = [
             "id",
             "title",
@@ -47,9 +92,145 @@ class ArtworkSerializer(serializers.ModelSerializer):
             "images",
         ]
 
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        if self.context.get("view").action == "list":
-            images = data.pop("images")
-            data["images"] = [images[0]] if images else []
-        return data
+
+# Columns ArtworkListSerializer reads, for `.values()` on the list queryset
+ARTWORK_LIST_VALUES = [
+    "id",
+    "title",
+    "painting_number",
+    "painting_year",
+    "width_inches",
+    "height_inches",
+    "medium",
+    "category",
+    "status",
+    "price_cents",
+    "created_at",
+    "sort_order",
+    "main_image_id",
+    "main_image_width",
+    "main_image_height",
+    "main_image__image",
+    "main_image__width",
+    "main_image__height",
+    "main_image__is_main_image",
+    "main_image__uploaded_at",
+]
+
+
+def build_absolute_url(request, storage, name):
+    if request and name:
+        return request.build_absolute_uri(storage.url(name))
+    return None
+
+
+class ArtworkCardListSerializer(TimedListSerializer):
+    def to_representation(self, data):
+        rows = list(data)
+        self.child.derivatives = self.child.load_derivatives(rows)
+        return [self.child.to_representation(row) for row in rows]
+
+
+class ArtworkListSerializer(TimedSerializerMixin, serializers.BaseSerializer):
+    """
+    Read-only artwork cards for ArtworkViewSet.list.
+
+    Renders the same JSON as ArtworkSerializer does on the list action, but from
+    `.values()` rows of ARTWORK_LIST_VALUES instead of model instances, and
+    without building serializer fields or a nested ImageSerializer per artwork.
+    The main images' derivatives are loaded for the whole list in one query.
+    """
+
+    decimal_field = serializers.DecimalField(max_digits=6, decimal_places=4)
+    datetime_field = serializers.DateTimeField()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.derivatives = None
+
+    @staticmethod
+    def load_derivatives(rows):
+        image_ids = [row["main_image_id"] for row in rows if row["main_image_id"]]
+        derivatives = {}
+        if image_ids:
+            for image_id, format, width, file in ImageDerivative.objects.filter(
+                image_id__in=image_ids
+            ).values_list("image_id", "format", "width", "file"):
+                derivatives.setdefault(image_id, []).append((format, width, file))
+        return derivatives
+
+    def image_representation(self, row, derivatives):
+        request = self.context.get("request")
+        image_storage = Image._meta.get_field("image").storage
+        derivative_storage = ImageDerivative._meta.get_field("file").storage
+
+        image_url = build_absolute_url(request, image_storage, row["main_image__image"])
+
+        # Same selection as ImageSerializer.get_thumbnail/get_srcset
+        thumbnails = [
+            (width, file)
+            for format, width, file in derivatives
+            if format == "webp" and width >= THUMBNAIL_WIDTH
+        ]
+        thumbnail = image_url
+        if thumbnails:
+            thumbnail = build_absolute_url(
+                request, derivative_storage, min(thumbnails)[1]
+            )
+
+        srcset = {}
+        for format, width, file in sorted(derivatives, key=lambda x: x[1]):
+            url = build_absolute_url(request, derivative_storage, file)
+            if url:
+                srcset.setdefault(format, []).append(f"{url} {width}w")
+
+        return {
+            "id": row["main_image_id"],
+            "image": image_url,
+            "thumbnail": thumbnail,
+            "srcset": {format: ", ".join(urls) for format, urls in srcset.items()},
+            "width": row["main_image__width"],
+            "height": row["main_image__height"],
+            "is_main_image": row["main_image__is_main_image"],
+            "uploaded_at": self.datetime_field.to_representation(
+                row["main_image__uploaded_at"]
+            ),
+        }
+
+    def to_representation(self, row):
+        derivatives = self.derivatives
+        if derivatives is None:
+            derivatives = self.load_derivatives([row])
+
+        images = []
+        if row["main_image_id"]:
+            images.append(
+                self.image_representation(
+                    row, derivatives.get(row["main_image_id"], [])
+                )
+            )
+
+        dimensions = None
+        if row["main_image_width"] is not None and row["main_image_height"] is not None:
+            dimensions = (row["main_image_width"], row["main_image_height"])
+
+        return {
+            "id": str(row["id"]),
+            "title": row["title"],
+            "painting_number": row["painting_number"],
+            "painting_year": row["painting_year"],
+            "width_inches": self.decimal_field.to_representation(row["width_inches"]),
+            "height_inches": self.decimal_field.to_representation(
+                row["height_inches"]
+            ),
+            "medium": row["medium"],
+            "category": row["category"],
+            "status": row["status"],
+            "price_cents": row["price_cents"],
+            "created_at": self.datetime_field.to_representation(row["created_at"]),
+            "image_dimensions": dimensions,
+            "images": images,
+        }
+
+    class Meta:
+        list_serializer_class = ArtworkCardListSerializer
@@ -0,0 +1,70 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from orders.models import Order
+from orders.status import refresh_order_status
+from .cache import bump_catalogue_version
+from .derivatives import delete_derivative_file, schedule_derivatives
+from .main_images import (
+    MAIN_IMAGE_FIELDS,
+    clear_other_main_images,
+    update_main_images,
+)
+from .models import Artwork, Image, ImageDerivative
+
+
+@receiver(post_save, sender=Image)
+def generate_image_derivatives(sender, instance, raw=False, **kwargs):
+    if raw or not instance.image:
+        return
+    schedule_derivatives(instance.pk)
+
+
+@receiver(post_delete, sender=ImageDerivative)
+def remove_derivative_file(sender, instance, **kwargs):
+    # Also runs for derivatives deleted by cascade with their Image or Artwork
+    delete_derivative_file(instance)
+
+
+@receiver(pre_save, sender=Image)
+def keep_single_main_image(sender, instance, raw=False, **kwargs):
+    if raw or not instance.is_main_image:
+        return
+    clear_other_main_images(instance)
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def update_artwork_main_image(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    (updated,) = update_main_images([instance.artwork_id])
+    # Keep an artwork the caller already holds in sync with the database
+    if Image.artwork.is_cached(instance):
+        for name in MAIN_IMAGE_FIELDS:
+            attname = Artwork._meta.get_field(name).attname
+            setattr(instance.artwork, attname, getattr(updated, attname))
+
+
+@receiver(post_save, sender=Artwork)
+@receiver(post_delete, sender=Artwork)
+def refresh_order_status_snapshots(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Artwork.save only records the new assignment after post_save, so this is
+    # still the order the artwork was loaded with.
+    saved_order_id, _ = getattr(instance, "_saved_assignment", (None, None))
+    order_ids = {instance.order_id, saved_order_id} - {None}
+    for order in Order.objects.filter(pk__in=order_ids):
+        refresh_order_status(order)
+
+
+@receiver(post_save, sender=Artwork)
+@receiver(post_delete, sender=Artwork)
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+@receiver(post_save, sender=ImageDerivative)
+@receiver(post_delete, sender=ImageDerivative)
+def invalidate_catalogue_cache(sender, **kwargs):
+    transaction.on_commit(bump_catalogue_version)
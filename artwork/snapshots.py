@@ -0,0 +1,277 @@
+"""
+Static snapshots of the public catalogue API.
+
+Each export renders the artwork list and every artwork detail exactly as
+ArtworkViewSet returns them, and writes them with `.gz` and `.br` siblings
+under STATIC_ROOT/catalogue/<version>/. Versions are named after a hash of
+their content and never change once written. `catalogue/current` is a symlink
+to the newest one, so nginx can serve it without reaching gunicorn. Only the
+exact list and detail paths are snapshotted; anything with a query string
+(filters, cursors, ?format=) and every other path go to Django, e.g.:
+
+    location = /api/artworks/ {
+        root /srv/static/catalogue/current;
+        error_page 418 = @django;
+        if ($args) { return 418; }
+        gzip_static on;
+        brotli_static on;
+        try_files /artworks.json @django;
+    }
+
+    location ~ "^/api/artworks/(?<artwork>[0-9a-f-]{36})/$" {
+        root /srv/static/catalogue/current;
+        error_page 418 = @django;
+        if ($args) { return 418; }
+        gzip_static on;
+        brotli_static on;
+        try_files /artworks/$artwork.json @django;
+    }
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import brotli
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIRNAME = "catalogue"
+CURRENT_LINK = "current"
+MANIFEST_NAME = "manifest.json"
+KEEP_VERSIONS = 3
+
+# Exports triggered by catalogue changes run off the request thread. A burst
+# of changes while one export is queued is covered by that export.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshots")
+_lock = threading.Lock()
+_pending = False
+
+
+def _gzip(content):
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def _brotli(content):
+    return brotli.compress(content, quality=11)
+
+
+# File suffix: compress function
+ENCODINGS = {".gz": _gzip, ".br": _brotli}
+
+
+def snapshot_root():
+    if not settings.STATIC_ROOT:
+        raise ImproperlyConfigured("STATIC_ROOT must be set to export the catalogue")
+    return Path(settings.STATIC_ROOT) / SNAPSHOT_DIRNAME
+
+
+class ExportSummary:
+    def __init__(self):
+        self.version = None
+        self.artworks = 0
+        self.written = 0
+        self.reused = 0
+        self.changed = False
+        self.elapsed = 0.0
+
+
+def _request(base_url, path):
+    url = urlsplit(base_url)
+    return Request(
+        RequestFactory().get(
+            path, secure=url.scheme == "https", HTTP_HOST=url.netloc or "localhost"
+        )
+    )
+
+
+def _view(action, base_url, path):
+    # Imported here because the views import the catalogue cache, which starts
+    # exports when the catalogue changes.
+    from .views import ArtworkViewSet
+
+    return ArtworkViewSet(
+        action=action,
+        request=_request(base_url, path),
+        format_kwarg=None,
+        args=(),
+        kwargs={},
+    )
+
+
+def render_payloads(base_url):
+    """Return `{relative path: JSON bytes}` for the list and every detail."""
+    renderer = JSONRenderer()
+
+    view = _view("list", base_url, "/api/artworks/")
+    queryset = view.filter_queryset(view.get_queryset())
+    payloads = {
+        "artworks.json": renderer.render(view.get_serializer(queryset, many=True).data)
+    }
+
+    view = _view("retrieve", base_url, "/api/artworks/")
+    for artwork in view.get_queryset().iterator(chunk_size=100):
+        payloads[f"artworks/{artwork.pk}.json"] = renderer.render(
+            view.get_serializer(artwork).data
+        )
+    return payloads
+
+
+def read_manifest(version_dir):
+    try:
+        with open(version_dir / MANIFEST_NAME) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def current_version_dir(root=None):
+    root = root or snapshot_root()
+    link = root / CURRENT_LINK
+    return link.resolve() if link.is_symlink() else None
+
+
+def _link_or_copy(source, target):
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def _switch_current(root, version):
+    temporary = root / f".{CURRENT_LINK}-{os.getpid()}-{threading.get_ident()}"
+    if temporary.is_symlink():
+        temporary.unlink()
+    temporary.symlink_to(version, target_is_directory=True)
+    os.replace(temporary, root / CURRENT_LINK)
+
+
+def _prune(root, keep):
+    current = current_version_dir(root)
+    versions = [
+        path
+        for path in root.iterdir()
+        if path.is_dir() and not path.is_symlink() and not path.name.startswith(".")
+    ]
+    versions.sort(key=lambda path: path.stat().st_mtime, reverse=True)
+    for path in versions[keep:]:
+        if current is None or path.name != current.name:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def export_snapshot(base_url=None, force=False, keep=KEEP_VERSIONS):
+    """
+    Render the catalogue and publish it as a new snapshot version if it changed.
+
+    Files whose content matches the current version are hard-linked from it
+    rather than compressed again. `force` rewrites every file, even if the
+    catalogue hasn't changed.
+    """
+    summary = ExportSummary()
+    start = time.perf_counter()
+    root = snapshot_root()
+    root.mkdir(parents=True, exist_ok=True)
+
+    payloads = render_payloads(
+        base_url or getattr(settings, "BASE_URL", None) or "http://localhost"
+    )
+    hashes = {
+        name: hashlib.sha256(content).hexdigest() for name, content in payloads.items()
+    }
+    summary.artworks = len(payloads) - 1
+    summary.version = hashlib.sha256(
+        json.dumps([sorted(hashes.items()), list(ENCODINGS)]).encode()
+    ).hexdigest()[:16]
+
+    previous_dir = current_version_dir(root)
+    previous = (read_manifest(previous_dir) if previous_dir else None) or {}
+    if previous.get("version") == summary.version and not force:
+        summary.elapsed = time.perf_counter() - start
+        return summary
+
+    target = root / summary.version
+    staging = Path(tempfile.mkdtemp(prefix=".export-", dir=root))
+    try:
+        (staging / "artworks").mkdir()
+        previous_files = previous.get("files", {})
+        reusable = not force and previous.get("encodings") == list(ENCODINGS)
+        for name, content in payloads.items():
+            path = staging / name
+            if reusable and previous_files.get(name) == hashes[name]:
+                for suffix in ["", *ENCODINGS]:
+                    _link_or_copy(previous_dir / f"{name}{suffix}", f"{path}{suffix}")
+                summary.reused += 1
+                continue
+
+            path.write_bytes(content)
+            for suffix, compress in ENCODINGS.items():
+                Path(f"{path}{suffix}").write_bytes(compress(content))
+            summary.written += 1
+
+        manifest = {
+            "version": summary.version,
+            "created_at": time.time(),
+            "encodings": list(ENCODINGS),
+            "files": hashes,
+        }
+        (staging / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+
+        if not target.exists():
+            os.rename(staging, target)
+        elif force:
+            stale = Path(tempfile.mkdtemp(prefix=".stale-", dir=root))
+            os.rename(target, stale / summary.version)
+            os.rename(staging, target)
+            shutil.rmtree(stale)
+        else:
+            # Another export published the same content first
+            shutil.rmtree(staging)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    _switch_current(root, summary.version)
+    _prune(root, keep)
+    summary.changed = True
+    summary.elapsed = time.perf_counter() - start
+    return summary
+
+
+def _export_in_background():
+    global _pending
+    with _lock:
+        # Changes committed from here on need another export
+        _pending = False
+    close_old_connections()
+    try:
+        export_snapshot()
+    except Exception:
+        logger.exception("Failed to export the catalogue snapshot")
+    finally:
+        close_old_connections()
+
+
+def schedule_snapshot():
+    """Queue a snapshot export unless one is already waiting to run."""
+    global _pending
+    if not settings.CATALOGUE_SNAPSHOT_ENABLED:
+        return
+    with _lock:
+        if _pending:
+            return
+        _pending = True
+    _executor.submit(_export_in_background)
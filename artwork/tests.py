@@ -1,7 +1,41 @@
-from django.test import TestCase
+import base64
+import gzip
+import io
+import json
+import os
+import tempfile
+import uuid
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+import brotli
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image as PILImage
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from orders.models import Order, Shipment
+from payments.views import create_order
+from portfolio.tests import factories
+from portfolio.tests.factories import create_artwork
+from .cache import get_cache_stats
+from .checks import check_shared_cache
+from .derivatives import generate_derivatives
+from .importers import import_artworks
+from .management.commands.benchmark import Command as BenchmarkCommand
+from .ingestion import ingest_images, painting_number_from_filename
+from .models import Artwork, Image, ImageDerivative
+from .serializers import ArtworkSerializer
+from .snapshots import current_version_dir, export_snapshot
+
 
 class APIPermissionsTestCase(TestCase):
     def setUp(self):
@@ -29,3 +63,847 @@ class APIPermissionsTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         response = self.client.post("/api/payments/")
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+def make_image_file(name="test.png", size=(40, 30)):
+    buffer = io.BytesIO()
+    PILImage.new("RGB", size, color="white").save(buffer, format="PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ArtworkQueryCountTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def create_artworks(self, count):
+        for i in range(count):
+            artwork = create_artwork(title=f"Artwork {i}", sort_order=i)
+            Image.objects.create(artwork=artwork, image=make_image_file())
+            Image.objects.create(
+                artwork=artwork,
+                image=make_image_file(size=(60, 80)),
+                is_main_image=True,
+            )
+
+    def test_list_query_count_is_constant(self):
+        # 2 aggregates for the ETag, then artworks joined to their main image
+        # and the main images' derivatives
+        self.create_artworks(2)
+        with self.assertNumQueries(4):
+            response = self.client.get("/api/artworks/")
+        self.assertEqual(len(response.data), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_artworks(5)
+        with self.assertNumQueries(4):
+            response = self.client.get("/api/artworks/")
+        self.assertEqual(len(response.data), 7)
+
+    def test_main_image_comes_first(self):
+        self.create_artworks(1)
+        artwork = Artwork.objects.get()
+
+        response = self.client.get(f"/api/artworks/{artwork.id}/")
+        self.assertEqual(response.data["image_dimensions"], (60, 80))
+        self.assertTrue(response.data["images"][0]["is_main_image"])
+
+        response = self.client.get("/api/artworks/")
+        self.assertEqual(len(response.data[0]["images"]), 1)
+        self.assertTrue(response.data[0]["images"][0]["is_main_image"])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class MainImagePointerTestCase(TestCase):
+    def setUp(self):
+        self.artwork = create_artwork()
+
+    def assertMainImage(self, image, dimensions):
+        artwork = Artwork.objects.get(pk=self.artwork.pk)
+        self.assertEqual(artwork.main_image_id, image.pk if image else None)
+        self.assertEqual(artwork.get_image_dimensions(), dimensions)
+
+    def test_first_image_until_one_is_marked_main(self):
+        first = Image.objects.create(
+            artwork=self.artwork, image=make_image_file(size=(40, 30))
+        )
+        self.assertMainImage(first, (40, 30))
+
+        main = Image.objects.create(
+            artwork=self.artwork,
+            image=make_image_file(size=(60, 80)),
+            is_main_image=True,
+        )
+        self.assertMainImage(main, (60, 80))
+
+    def test_at_most_one_main_image(self):
+        first = Image.objects.create(
+            artwork=self.artwork, image=make_image_file(), is_main_image=True
+        )
+        second = Image.objects.create(
+            artwork=self.artwork,
+            image=make_image_file(size=(60, 80)),
+            is_main_image=True,
+        )
+
+        first.refresh_from_db()
+        self.assertFalse(first.is_main_image)
+        self.assertMainImage(second, (60, 80))
+
+        first.is_main_image = True
+        first.save()
+        self.assertEqual(
+            list(self.artwork.images.filter(is_main_image=True)), [first]
+        )
+        self.assertMainImage(first, (40, 30))
+
+    def test_deleting_main_image(self):
+        other = Image.objects.create(
+            artwork=self.artwork, image=make_image_file(size=(60, 80))
+        )
+        main = Image.objects.create(
+            artwork=self.artwork, image=make_image_file(), is_main_image=True
+        )
+
+        main.delete()
+        self.assertMainImage(other, (60, 80))
+
+        other.delete()
+        self.assertMainImage(None, None)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ArtworkListSerializerTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_matches_artwork_serializer(self):
+        with_derivatives = create_artwork(title="Derivatives", painting_number=1)
+        image = Image.objects.create(
+            artwork=with_derivatives,
+            image=make_image_file(size=(1000, 800)),
+            is_main_image=True,
+        )
+        generate_derivatives(image)
+        unmarked = create_artwork(title="Unmarked", sort_order=1)
+        Image.objects.create(artwork=unmarked, image=make_image_file())
+        create_artwork(title="No images", sort_order=2)
+
+        response = self.client.get("/api/artworks/")
+
+        request = response.wsgi_request
+        expected = ArtworkSerializer(
+            Artwork.objects.all(),
+            many=True,
+            context={"request": request, "view": mock.Mock(action="list")},
+        ).data
+        self.assertEqual(json.loads(response.content), json.loads(json.dumps(expected)))
+        self.assertTrue(response.data[0]["images"][0]["srcset"])
+        self.assertEqual(response.data[2]["images"], [])
+
+
+class ArtworkShipmentAssignmentTestCase(TestCase):
+    def setUp(self):
+        self.order = factories.create_order(
+            stripe_session_id="cs_1", stripe_payment_intent_id="pi_1"
+        )
+        self.shipment = Shipment.objects.create(order=self.order, shipping_via="USPS")
+        self.other_order = factories.create_order(
+            stripe_session_id="cs_2", stripe_payment_intent_id="pi_2"
+        )
+        self.other_shipment = Shipment.objects.create(
+            order=self.other_order, shipping_via="USPS"
+        )
+
+    def test_save_does_not_load_the_shipment(self):
+        artwork = create_artwork(order=self.order)
+
+        # The UPDATE, then the order's status snapshot rebuild: the order, its
+        # artworks and shipments, and the upsert
+        artwork.shipment = self.shipment
+        with self.assertNumQueries(5):
+            artwork.save()
+
+        artwork = Artwork.objects.get(pk=artwork.pk)
+        artwork.title = "Renamed"
+        with self.assertNumQueries(5):
+            artwork.save()
+
+        artwork.shipment_id = self.other_shipment.pk
+        with self.assertNumQueries(1):
+            with self.assertRaises(ValidationError):
+                artwork.save()
+
+    def test_bulk_assignment(self):
+        artworks = [create_artwork(order=self.order) for _ in range(3)]
+
+        with self.assertNumQueries(1):
+            Artwork.objects.assign_to_shipment(self.shipment, artworks)
+        self.assertEqual(
+            Artwork.objects.filter(shipment=self.shipment).count(), len(artworks)
+        )
+
+        foreign = create_artwork(order=self.other_order)
+        with self.assertRaises(ValidationError):
+            Artwork.objects.assign_to_shipment(
+                self.other_shipment, [foreign.pk, artworks[0].pk]
+            )
+        # Nothing is assigned when any artwork belongs to another order
+        self.assertFalse(Artwork.objects.filter(shipment=self.other_shipment).exists())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ImageDimensionsTestCase(TestCase):
+    def test_dimensions_are_stored_on_upload(self):
+        artwork = create_artwork()
+        image = Image.objects.create(
+            artwork=artwork, image=make_image_file(size=(120, 90))
+        )
+        image.refresh_from_db()
+        self.assertEqual((image.width, image.height), (120, 90))
+        self.assertEqual(artwork.get_image_dimensions(), (120, 90))
+
+    def test_backfill_command(self):
+        artwork = create_artwork()
+        image = Image.objects.create(
+            artwork=artwork, image=make_image_file(size=(120, 90))
+        )
+        Image.objects.filter(pk=image.pk).update(width=None, height=None)
+
+        call_command("backfill_image_dimensions", batch_size=1, stdout=io.StringIO())
+
+        self.assertEqual(
+            Image.objects.values_list("width", "height").get(pk=image.pk), (120, 90)
+        )
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ImageDerivativeTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.artwork = create_artwork()
+        self.image = Image.objects.create(
+            artwork=self.artwork,
+            image=make_image_file(size=(1000, 800)),
+            is_main_image=True,
+        )
+
+    def test_generates_widths_smaller_than_original(self):
+        derivatives = generate_derivatives(self.image)
+
+        self.assertEqual(sorted({d.width for d in derivatives}), [320, 640])
+        self.assertIn("webp", {d.format for d in derivatives})
+        for derivative in derivatives:
+            self.assertEqual(derivative.height, round(800 * derivative.width / 1000))
+
+        # Up-to-date derivatives are left alone
+        self.assertEqual(
+            {d.pk for d in generate_derivatives(self.image)},
+            {d.pk for d in derivatives},
+        )
+
+    def test_old_files_are_removed_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            old = generate_derivatives(self.image)
+        storage = old[0].file.storage
+        old_names = [derivative.file.name for derivative in old]
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            generate_derivatives(self.image, force=True)
+        # Still on disk until the regeneration commits
+        self.assertTrue(all(storage.exists(name) for name in old_names))
+        for callback in callbacks:
+            callback()
+        self.assertFalse(any(storage.exists(name) for name in old_names))
+
+        new_names = list(
+            ImageDerivative.objects.values_list("file", flat=True).order_by("id")
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.artwork.delete()
+        self.assertFalse(any(storage.exists(name) for name in new_names))
+
+    def test_serializes_thumbnail_and_srcset(self):
+        response = self.client.get("/api/artworks/")
+        image = response.data[0]["images"][0]
+        self.assertEqual(image["thumbnail"], image["image"])
+        self.assertEqual(image["srcset"], {})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_derivatives(self.image)
+
+        response = self.client.get("/api/artworks/")
+        image = response.data[0]["images"][0]
+        self.assertTrue(image["thumbnail"].endswith("_640w.webp"))
+        self.assertRegex(
+            image["srcset"]["webp"], r"_320w\.webp 320w, .*_640w\.webp 640w$"
+        )
+
+
+class ArtworkResponseCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.artwork = create_artwork(title="Original")
+
+    def test_list_and_detail_are_cached(self):
+        self.client.get("/api/artworks/")
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/artworks/")
+        self.assertEqual(response.data[0]["title"], "Original")
+
+        self.client.get(f"/api/artworks/{self.artwork.id}/")
+        with self.assertNumQueries(0):
+            self.client.get(f"/api/artworks/{self.artwork.id}/")
+
+        self.assertEqual(get_cache_stats()["hits"], 2)
+        self.assertEqual(get_cache_stats()["misses"], 2)
+
+    def test_query_params_are_part_of_the_key(self):
+        response = self.client.get("/api/artworks/")
+        self.assertEqual(len(response.data), 1)
+        response = self.client.get("/api/artworks/?status=sold")
+        self.assertEqual(len(response.data), 0)
+
+    def test_saving_an_artwork_invalidates(self):
+        self.client.get("/api/artworks/")
+
+        self.artwork.title = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.artwork.save()
+
+        response = self.client.get("/api/artworks/")
+        self.assertEqual(response.data[0]["title"], "Renamed")
+
+    def test_create_order_invalidates(self):
+        self.client.get("/api/artworks/?status=available")
+
+        session = {
+            "id": "cs_test",
+            "payment_intent": "pi_test",
+            "payment_status": "paid",
+            "metadata": {"product_ids": str(self.artwork.id)},
+            "customer_details": {"email": "buyer@example.com"},
+            "shipping_details": {
+                "name": "Buyer",
+                "address": {
+                    "line1": "1 Main St",
+                    "city": "Denver",
+                    "postal_code": "80202",
+                    "state": "CO",
+                    "country": "US",
+                },
+            },
+            "shipping_cost": {"shipping_rate": "shr_test"},
+            "total_details": {"amount_shipping": 1000},
+            "amount_subtotal": 50000,
+            "amount_total": 51000,
+            "currency": "usd",
+        }
+        with mock.patch("payments.views.send_order_confirmation"):
+            with self.captureOnCommitCallbacks(execute=True):
+                create_order(session)
+
+        response = self.client.get("/api/artworks/?status=available")
+        self.assertEqual(response.data, [])
+
+    def test_cache_stats_requires_staff(self):
+        response = self.client.get("/api/artworks/cache-stats/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        staff = User.objects.create_user("staff", password="pw", is_staff=True)
+        self.client.force_authenticate(staff)
+        response = self.client.get("/api/artworks/cache-stats/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {"version", "hits", "misses"})
+
+    def test_deploy_check_requires_shared_cache(self):
+        with override_settings(DEBUG=False):
+            (error,) = check_shared_cache(None)
+        self.assertEqual(error.id, "artwork.E001")
+
+        shared = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache",
+                "LOCATION": "127.0.0.1:11211",
+            }
+        }
+        with override_settings(DEBUG=False, CACHES=shared):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class ConditionalGetTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.artwork = create_artwork()
+
+    def test_etag_round_trip(self):
+        for url in [
+            "/api/artworks/",
+            f"/api/artworks/{self.artwork.id}/",
+            "/api/images/",
+        ]:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            etag = response["ETag"]
+            self.assertFalse(etag.startswith("W/"))
+            self.assertIn("Last-Modified", response)
+
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response["ETag"], etag)
+
+    def test_if_modified_since(self):
+        response = self.client.get("/api/artworks/")
+        response = self.client.get(
+            "/api/artworks/", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_changes_with_catalogue(self):
+        etag = self.client.get("/api/artworks/")["ETag"]
+        self.assertNotEqual(etag, self.client.get("/api/artworks/?status=sold")["ETag"])
+
+        self.artwork.title = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.artwork.save()
+
+        response = self.client.get("/api/artworks/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class KeysetPaginationTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 2)
+            ids.extend(item["id"] for item in response.data["results"])
+            url = response.data["next"]
+        return ids
+
+    def test_artwork_pages_cover_ties(self):
+        # Equal sort_order values must be split by id without gaps or repeats
+        artworks = [create_artwork(sort_order=i // 3) for i in range(7)]
+
+        ids = self.walk("/api/artworks/?page_size=2")
+
+        expected = sorted(artworks, key=lambda x: (x.sort_order, x.id))
+        self.assertEqual(ids, [str(artwork.id) for artwork in expected])
+
+    def test_image_pages(self):
+        artwork = create_artwork()
+        images = [
+            Image.objects.create(artwork=artwork, image=make_image_file())
+            for _ in range(5)
+        ]
+
+        ids = self.walk("/api/images/?page_size=2")
+
+        self.assertEqual(ids, [image.id for image in images])
+
+    def test_unpaginated_without_parameters(self):
+        create_artwork()
+        response = self.client.get("/api/artworks/")
+        self.assertIsInstance(response.data, list)
+
+    def test_invalid_cursor(self):
+        for position in ["not-a-cursor", ["abc", "x"], [1, "not-a-uuid"], [1, None]]:
+            with self.subTest(position=position):
+                cursor = position
+                if not isinstance(position, str):
+                    cursor = base64.urlsafe_b64encode(
+                        json.dumps(position).encode()
+                    ).decode()
+                response = self.client.get(f"/api/artworks/?cursor={cursor}")
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN output is PostgreSQL specific")
+class QueryIndexTestCase(TestCase):
+    def setUp(self):
+        # The test tables are tiny, so without this the planner would always
+        # pick a sequential scan. We only want to know an index is usable.
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, plan)
+
+    def test_public_artwork_list(self):
+        self.assertUsesIndex(
+            Artwork.objects.filter(status__in=["available", "sold"]),
+            "artwork_status_sort_order_idx",
+        )
+
+    def test_main_image_lookup(self):
+        artwork = create_artwork()
+        self.assertUsesIndex(
+            Image.objects.filter(artwork=artwork, is_main_image=True),
+            "image_main_image_idx",
+        )
+
+    def test_unshipped_order_artworks(self):
+        order_id = uuid.uuid4()
+        self.assertUsesIndex(
+            Artwork.objects.filter(order_id=order_id, shipment__isnull=True),
+            "artwork_unshipped_order_idx",
+        )
+
+    def test_admin_title_search(self):
+        self.assertUsesIndex(
+            Artwork.objects.filter(title__icontains="dawn"), "artwork_title_trgm_idx"
+        )
+
+    def test_order_lookup_by_stripe_ids(self):
+        plan = Order.objects.filter(
+            Q(stripe_session_id="cs_test") | Q(stripe_payment_intent_id="pi_test")
+        ).explain()
+        self.assertIn("stripe_session_id", plan)
+        self.assertIn("stripe_payment_intent_id", plan)
+        self.assertIn("Bitmap Index Scan", plan)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class AdminChangelistQueryCountTestCase(TestCase):
+    def setUp(self):
+        admin_user = User.objects.create_superuser("admin", password="pw")
+        self.client.force_login(admin_user)
+
+    def create_artworks(self, count):
+        for i in range(count):
+            artwork = create_artwork(title=f"Artwork {i}")
+            Image.objects.create(artwork=artwork, image=make_image_file())
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_changelists_are_constant(self):
+        urls = ["/admin/artwork/artwork/", "/admin/artwork/image/"]
+        self.create_artworks(1)
+        small = [self.count_queries(url) for url in urls]
+        self.create_artworks(4)
+        large = [self.count_queries(url) for url in urls]
+
+        self.assertEqual(small, large)
+
+
+class BenchmarkCommandTestCase(TestCase):
+    def test_benchmark_reports_every_scenario(self):
+        cache.set("benchmark:sentinel", "live")
+
+        # The command itself runs this against a throwaway test database
+        results = BenchmarkCommand().benchmark(
+            {
+                "artworks": 6,
+                "images_per_artwork": 2,
+                "orders": 2,
+                "shipments_per_order": 1,
+                "iterations": 1,
+                "no_memory": True,
+            }
+        )
+
+        # Its cache is separate from the configured one
+        self.assertEqual(cache.get("benchmark:sentinel"), "live")
+        self.assertEqual(results["meta"]["artworks"], 6)
+        self.assertEqual(
+            set(results["results"]),
+            {
+                "artwork_list",
+                "artwork_list_cached",
+                "artwork_detail",
+                "image_list",
+                "artwork_list_model_serializer",
+                "artwork_list_serializer",
+                "checkout",
+                "stripe_webhook",
+                "stripe_event_processing",
+            },
+        )
+        self.assertEqual(results["results"]["artwork_list_cached"]["queries"]["max"], 0)
+
+
+CSV_HEADER = (
+    "painting_number,title,medium,paper,width_inches,height_inches,"
+    "price_cents,category\n"
+)
+
+
+class ArtworkImportTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def csv_file(self, *rows):
+        return io.StringIO(CSV_HEADER + "".join(f"{row}\n" for row in rows))
+
+    def test_bulk_import(self):
+        file = self.csv_file(
+            "1,Dawn,oil_panel,false,12,16,50000,landscape",
+            "2,Dusk,oil_paper,yes,9.5,12.25,30000,figure",
+        )
+
+        with self.assertNumQueries(4):
+            with self.captureOnCommitCallbacks(execute=True):
+                summary = import_artworks(file, batch_size=10)
+
+        self.assertEqual((summary.rows, summary.created), (2, 2))
+        dusk = Artwork.objects.get(painting_number=2)
+        self.assertTrue(dusk.paper)
+        self.assertEqual(dusk.width_inches, Decimal("9.5"))
+        self.assertEqual(dusk.status, "unavailable")
+        self.assertEqual(dusk.painting_year, 2024)
+
+    def test_invalid_rows_abort_import(self):
+        file = self.csv_file(
+            "1,Dawn,oil_panel,false,12,16,50000,landscape",
+            "2,Dusk,watercolor,false,12,16,abc,figure",
+            "1,Again,oil_panel,false,12,16,50000,landscape",
+        )
+
+        summary = import_artworks(file)
+
+        self.assertFalse(summary.committed)
+        self.assertEqual([line for line, _, _ in summary.failures], [3, 4])
+        self.assertIn("medium", summary.failures[0][2])
+        self.assertIn("price_cents", summary.failures[0][2])
+        self.assertFalse(Artwork.objects.exists())
+
+    def test_invalid_rows_roll_back_written_batches(self):
+        file = self.csv_file(
+            "1,Dawn,oil_panel,false,12,16,50000,landscape",
+            "2,Dusk,oil_panel,false,12,16,50000,portrait",
+        )
+
+        # The first row is written in its own batch before the second is read
+        summary = import_artworks(file, batch_size=1)
+
+        self.assertFalse(summary.committed)
+        self.assertEqual(summary.created, 0)
+        self.assertFalse(Artwork.objects.exists())
+
+    def test_skip_invalid(self):
+        file = self.csv_file(
+            "1,Dawn,oil_panel,false,12,16,50000,landscape",
+            "2,Dusk,oil_panel,false,12,16,50000,portrait",
+        )
+
+        summary = import_artworks(file, skip_invalid=True)
+
+        self.assertEqual((summary.created, len(summary.failures)), (1, 1))
+        self.assertEqual(Artwork.objects.get().title, "Dawn")
+
+    def test_upsert_by_painting_number(self):
+        existing = create_artwork(painting_number=1, title="Old", status="sold")
+        file = self.csv_file(
+            "1,Dawn,oil_mdf,false,12,16,70000,landscape",
+            "2,Dusk,oil_panel,false,12,16,50000,figure",
+        )
+
+        summary = import_artworks(io.StringIO(file.getvalue()))
+        self.assertEqual((summary.created, summary.skipped), (1, 1))
+        self.assertEqual(Artwork.objects.get(pk=existing.pk).title, "Old")
+
+        summary = import_artworks(file, upsert=True)
+        self.assertEqual((summary.created, summary.updated), (0, 2))
+        existing.refresh_from_db()
+        self.assertEqual(
+            (existing.title, existing.medium, existing.price_cents, existing.status),
+            ("Dawn", "oil_mdf", 70000, "sold"),
+        )
+        self.assertEqual(Artwork.objects.count(), 2)
+
+    def test_command_reports_summary(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as file:
+            file.write(CSV_HEADER + "1,Dawn,oil_panel,false,12,16,50000,landscape\n")
+            file.flush()
+            stdout = io.StringIO()
+            call_command("load_artworks", file.name, stdout=stdout)
+
+        self.assertIn("1 created", stdout.getvalue())
+        self.assertIn("rows/s", stdout.getvalue())
+
+    def test_command_fails_on_invalid_rows(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as file:
+            file.write(CSV_HEADER + "1,Dawn,oil_panel,false,12,16,50000,portrait\n")
+            file.flush()
+            with self.assertRaises(CommandError):
+                call_command("load_artworks", file.name, stderr=io.StringIO())
+
+        self.assertFalse(Artwork.objects.exists())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ImageIngestionTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+
+    def write_image(self, name, size=(40, 30)):
+        PILImage.new("RGB", size, color="white").save(
+            os.path.join(self.directory, name)
+        )
+
+    def test_painting_number_from_filename(self):
+        self.assertEqual(painting_number_from_filename("/a/123.jpg"), 123)
+        self.assertEqual(painting_number_from_filename("123-detail.png"), 123)
+        self.assertEqual(painting_number_from_filename("123_2.jpg"), 123)
+        self.assertIsNone(painting_number_from_filename("detail-123.jpg"))
+        self.assertIsNone(painting_number_from_filename("123abc.jpg"))
+
+    def test_ingests_and_marks_main_image(self):
+        first = create_artwork(painting_number=1)
+        second = create_artwork(painting_number=2)
+        Image.objects.create(
+            artwork=second, image=make_image_file(), is_main_image=True
+        )
+        self.write_image("1-detail.png")
+        self.write_image("1.png", size=(120, 90))
+        self.write_image("2.png")
+        self.write_image("3.png")
+        self.write_image("notes.png")
+        with open(os.path.join(self.directory, "4.jpg"), "wb") as file:
+            file.write(b"not an image")
+        create_artwork(painting_number=4)
+
+        summary = ingest_images(
+            self.directory, workers=1, generate_derivatives=False
+        )
+
+        self.assertEqual((summary.files, summary.created), (6, 3))
+        self.assertEqual(
+            sorted(name for name, _ in summary.failures),
+            ["3.png", "4.jpg", "notes.png"],
+        )
+        main = Image.objects.get(artwork=first, is_main_image=True)
+        self.assertEqual((main.width, main.height), (120, 90))
+        first.refresh_from_db()
+        self.assertEqual(first.main_image_id, main.pk)
+        self.assertEqual(first.get_image_dimensions(), (120, 90))
+        self.assertEqual(first.images.count(), 2)
+        self.assertEqual(
+            Image.objects.filter(artwork=second, is_main_image=True).count(), 1
+        )
+
+    def test_process_pool(self):
+        create_artwork(painting_number=1)
+        for i in range(3):
+            self.write_image(f"1-{i}.png", size=(10 + i, 10))
+
+        summary = ingest_images(
+            self.directory, workers=2, generate_derivatives=False
+        )
+
+        self.assertEqual(summary.created, 3)
+        self.assertEqual(
+            sorted(Image.objects.values_list("width", flat=True)), [10, 11, 12]
+        )
+
+    def test_command_reports_summary(self):
+        create_artwork(painting_number=1)
+        self.write_image("1.png")
+        stdout = io.StringIO()
+
+        call_command(
+            "ingest_images",
+            self.directory,
+            workers=1,
+            skip_derivatives=True,
+            stdout=stdout,
+        )
+
+        self.assertIn("1 images created", stdout.getvalue())
+        self.assertTrue(Image.objects.get().is_main_image)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class CatalogueSnapshotTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        static_root = override_settings(STATIC_ROOT=tempfile.mkdtemp())
+        static_root.enable()
+        self.addCleanup(static_root.disable)
+
+        self.artwork = create_artwork(title="Dawn")
+        Image.objects.create(
+            artwork=self.artwork, image=make_image_file(), is_main_image=True
+        )
+        create_artwork(title="Hidden", status="unavailable")
+
+    def export(self, **kwargs):
+        return export_snapshot(base_url="http://testserver", **kwargs)
+
+    def read(self, name):
+        with open(current_version_dir() / name, "rb") as file:
+            return file.read()
+
+    def test_files_match_api_responses(self):
+        summary = self.export()
+
+        self.assertTrue(summary.changed)
+        self.assertEqual((summary.artworks, summary.written), (1, 2))
+        self.assertEqual(
+            self.read("artworks.json"), self.client.get("/api/artworks/").content
+        )
+        detail = f"artworks/{self.artwork.pk}.json"
+        self.assertEqual(
+            self.read(detail),
+            self.client.get(f"/api/artworks/{self.artwork.pk}/").content,
+        )
+        self.assertEqual(gzip.decompress(self.read(f"{detail}.gz")), self.read(detail))
+        self.assertEqual(
+            brotli.decompress(self.read(f"{detail}.br")), self.read(detail)
+        )
+
+    def test_incremental_export(self):
+        first = self.export()
+        self.assertFalse(self.export().changed)
+
+        other = create_artwork(title="Dusk", sort_order=1)
+        second = self.export()
+
+        self.assertNotEqual(first.version, second.version)
+        # The new artwork and the list change, the existing detail is reused
+        self.assertEqual((second.written, second.reused), (2, 1))
+        self.assertTrue(self.read(f"artworks/{other.pk}.json"))
+
+    def test_catalogue_changes_schedule_export(self):
+        with override_settings(CATALOGUE_SNAPSHOT_ENABLED=True), mock.patch(
+            "artwork.snapshots._pending", False
+        ):
+            with mock.patch("artwork.snapshots._executor") as executor:
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.artwork.title = "Renamed"
+                    self.artwork.save()
+                    Image.objects.create(artwork=self.artwork, image=make_image_file())
+
+        # Both changes are covered by one queued export
+        self.assertEqual(executor.submit.call_count, 1)
+
+    def test_command(self):
+        stdout = io.StringIO()
+        call_command("export_catalogue", base_url="http://testserver", stdout=stdout)
+        self.assertIn("1 artworks", stdout.getvalue())
+
+        stdout = io.StringIO()
+        call_command("export_catalogue", base_url="http://testserver", stdout=stdout)
+        self.assertIn("up to date", stdout.getvalue())
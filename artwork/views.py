@@ -1,22 +1,29 @@
 import django_filters
+from django.db.models import Prefetch
 from django.shortcuts import render
 from django.http import HttpResponse
 from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.exceptions import NotFound
 from rest_framework.parsers import MultiPartParser, FormParser
 
 from utils.order_emails import (
+    build_order_email_context,
     send_order_confirmation,
     send_shipment_started,
     send_shipment_completed,
 )
 from orders.models import Order
+from .cache import CachedResponseMixin, ConditionalGetMixin, get_cache_stats
 from .models import Artwork, Image, Order
-from .permissions import IsAdminOrReadOnly
+from .pagination import ArtworkPagination, ImagePagination
+from .permissions import IsAdminOrReadOnly, IsAdminUser
 from .serializers import (
+    ARTWORK_LIST_VALUES,
+    ArtworkListSerializer,
     ArtworkSerializer,
     ImageSerializer,
 )
@@ -39,13 +46,16 @@ class ArtworkFilter(django_filters.FilterSet):
         return queryset
 
 
-class ArtworkViewSet(viewsets.ReadOnlyModelViewSet):
+class ArtworkViewSet(
+    ConditionalGetMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet
+):
     permission_classes = [IsAdminOrReadOnly]
     queryset = Artwork.objects.all()
     serializer_class = ArtworkSerializer
     parser_classes = (MultiPartParser, FormParser)
     filter_backends = [django_filters.rest_framework.DjangoFilterBackend]
     filterset_class = ArtworkFilter
+    pagination_class = ArtworkPagination
 
     def perform_create(self, serializer):
         artwork = serializer.save()
@@ -54,6 +64,19 @@ class ArtworkViewSet(viewsets.ReadOnlyModelViewSet):
 
     def get_queryset(self):
         queryset = super().get_queryset()
+        if self.action == "list":
+            # Cards only show the main image, which is denormalized on Artwork,
+            # and are rendered straight from rows by ArtworkListSerializer
+            queryset = queryset.values(*ARTWORK_LIST_VALUES)
+        else:
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "images",
+                    queryset=Image.objects.prefetch_related("derivatives").order_by(
+                        "-is_main_image", "id"
+                    ),
+                )
+            )
 
         if 'status' not in self.request.query_params:
             queryset = queryset.filter(
@@ -61,6 +84,11 @@ class ArtworkViewSet(viewsets.ReadOnlyModelViewSet):
             )
         return queryset
 
+    def get_serializer_class(self):
+        if self.action == "list":
+            return ArtworkListSerializer
+        return super().get_serializer_class()
+
     def get_object(self):
         try:
             obj = super().get_object()
@@ -70,12 +98,21 @@ class ArtworkViewSet(viewsets.ReadOnlyModelViewSet):
         except NotFound:
             raise NotFound("Artwork not found")
 
+    @action(
+        detail=False,
+        url_path="cache-stats",
+        permission_classes=[IsAdminUser],
+    )
+    def cache_stats(self, request):
+        return Response(get_cache_stats())
+
 
-class ImageViewSet(viewsets.ReadOnlyModelViewSet):
+class ImageViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     permission_classes = [IsAdminOrReadOnly]
-    queryset = Image.objects.all()
+    queryset = Image.objects.prefetch_related("derivatives")
     serializer_class = ImageSerializer
     parser_classes = (MultiPartParser, FormParser)
+    pagination_class = ImagePagination
 
 
 class TestEmailSendView(APIView):
@@ -94,21 +131,7 @@ class PreviewEmailTemplateView(APIView):
         if not order:
             return HttpResponse("No orders found to preview")
 
-        artworks = order.artworks.all()
-        shipment = order.shipments.first()
-        image_urls = {}
-        for artwork in artworks:
-            if artwork.images.exists():
-                image_urls[artwork.id] = (
-                    f"{settings.BASE_URL}/media/{artwork.images.first().image}"
-                )
-
-        context = {
-            "order": order,
-            "artworks": artworks,
-            "image_urls": image_urls,
-            "shipment": shipment,
-            "debug": settings.DEBUG,
-        }
+        context = build_order_email_context(order, order.shipments.first())
+        context["debug"] = settings.DEBUG
 
         return render(request, self.TEMPLATE_TO_VIEW, context)
@@ -1,8 +1,11 @@
 from django.contrib import admin
 from django import forms
+from django.db.models import Count
 
 from artwork.models import Artwork
-from .models import Order, Payment, Shipment
+from .models import Order, OutboundEmail, Payment, Shipment
+from .shipments import save_shipment
+from .status import refresh_order_status
 
 
 class ShipmentInlineForm(forms.ModelForm):
@@ -37,21 +40,16 @@ class ShipmentInlineForm(forms.ModelForm):
             if self.instance and self.instance.pk:
                 self.initial["artworks"] = self.instance.artworks.all()
 
+    def clean_artworks(self):
+        artworks = self.cleaned_data["artworks"]
+        if not artworks:
+            raise forms.ValidationError("Shipment must have at least one artwork")
+        return artworks
+
     def save(self, commit=True):
         instance = super().save(commit=False)
         if commit:
-            instance.save()
-
-            selected_artworks = self.cleaned_data["artworks"]
-            for artwork in selected_artworks:
-                artwork.shipment = instance
-                artwork.save()
-            instance.artworks.exclude(id__in=[a.id for a in selected_artworks]).update(
-                shipment=None
-            )
-
-            instance.save()
-
+            save_shipment(instance, self.cleaned_data["artworks"])
         return instance
 
     class Meta:
@@ -112,6 +110,7 @@ class OrderAdmin(admin.ModelAdmin):
         "customer_email",
         "status",
         "total_cents",
+        "artwork_count",
         "shipping_postal_code",
     ]
     list_filter = ["status", "created_at"]
@@ -158,6 +157,18 @@ class OrderAdmin(admin.ModelAdmin):
         ),
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(artwork_count=Count("artworks"))
+
+    @admin.display(description="Artworks", ordering="artwork_count")
+    def artwork_count(self, obj):
+        return obj.artwork_count
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Covers edits to the order itself and shipments deleted inline
+        refresh_order_status(form.instance)
+
 
 class PaymentAdmin(admin.ModelAdmin):
     list_display = [
@@ -169,7 +180,9 @@ class PaymentAdmin(admin.ModelAdmin):
         "status",
     ]
     list_filter = ["status", "created_at"]
-    search_fields = ["order__customer_email", "stripe_payment_intent_id"]
+    list_select_related = ["order"]
+    # Payment intent ids are pasted whole, so they are matched exactly
+    search_fields = ["order__customer_email", "=stripe_payment_intent_id"]
     fieldsets = (
         (
             "Payment Details",
@@ -195,8 +208,9 @@ class PaymentAdmin(admin.ModelAdmin):
 
 
 class ShipmentAdmin(admin.ModelAdmin):
-    list_display = ["__str__", "order", "shipping_via", "created_at"]
+    list_display = ["__str__", "order", "shipping_via", "artwork_count", "created_at"]
     list_filter = ["created_at", "shipping_via"]
+    list_select_related = ["order"]
     search_fields = ["order__customer_email", "tracking_number"]
     fields = [
         "shipping_via",
@@ -206,7 +220,28 @@ class ShipmentAdmin(admin.ModelAdmin):
         "tracking_url",
     ]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(artwork_count=Count("artworks"))
+
+    @admin.display(description="Artworks", ordering="artwork_count")
+    def artwork_count(self, obj):
+        return obj.artwork_count
+
+
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = [
+        "__str__",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "sent_at",
+    ]
+    list_filter = ["status", "created_at"]
+    search_fields = ["to_email", "idempotency_key"]
+    readonly_fields = ["idempotency_key", "created_at", "sent_at"]
+
 
 admin.site.register(Order, OrderAdmin)
 admin.site.register(Shipment, ShipmentAdmin)
 admin.site.register(Payment, PaymentAdmin)
+admin.site.register(OutboundEmail, OutboundEmailAdmin)
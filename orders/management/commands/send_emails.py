@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.email_outbox import deliver_due_emails
+
+
+class Command(BaseCommand):
+    help = "Send queued order and shipment emails, retrying failures with backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Send whatever is due and exit instead of polling",
+        )
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait between polls when the outbox is empty",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = deliver_due_emails(limit=options["batch_size"])
+            if sent or failed:
+                self.stdout.write(f"Sent {sent} emails, {failed} failed")
+
+            if options["once"]:
+                break
+            if sent + failed < options["batch_size"]:
+                time.sleep(options["interval"])
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.3 on 2026-10-17 16:40
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("orders", "0003_outboundemail"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="order",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("customer_email"),
+                    name="gin_trgm_ops",
+                ),
+                name="order_email_trgm_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("shipping_postal_code"),
+                    name="gin_trgm_ops",
+                ),
+                name="order_postal_code_trgm_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                django.db.models.functions.text.Upper("stripe_payment_intent_id"),
+                name="payment_intent_upper_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="shipment",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("tracking_number"),
+                    name="gin_trgm_ops",
+                ),
+                name="shipment_tracking_trgm_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.3 on 2026-10-17 17:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("orders", "0004_admin_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrderStatusSnapshot",
+            fields=[
+                (
+                    "order",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="status_snapshot",
+                        serialize=False,
+                        to="orders.order",
+                    ),
+                ),
+                ("customer_email", models.EmailField(max_length=254)),
+                ("data", models.JSONField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
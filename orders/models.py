@@ -1,10 +1,9 @@
 import uuid
-from django.db import models
-from django.core.exceptions import ValidationError
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import models, transaction
+from django.db.models.functions import Upper
 from django.utils import timezone
 
-from utils.order_emails import send_shipment_started, send_shipment_completed
-
 
 class Order(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -36,6 +35,20 @@ class Order(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # icontains compares UPPER(column), so the trigram indexes backing the
+        # admin search are built on the same expression.
+        indexes = [
+            GinIndex(
+                OpClass(Upper("customer_email"), name="gin_trgm_ops"),
+                name="order_email_trgm_idx",
+            ),
+            GinIndex(
+                OpClass(Upper("shipping_postal_code"), name="gin_trgm_ops"),
+                name="order_postal_code_trgm_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"Order made by {self.customer_email}"
 
@@ -60,6 +73,14 @@ class Payment(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Backs the admin's exact (iexact) payment intent search
+            models.Index(
+                Upper("stripe_payment_intent_id"), name="payment_intent_upper_idx"
+            ),
+        ]
+
     def __str__(self):
         return f"Payment made by {self.order.customer_email}"
 
@@ -81,36 +102,78 @@ class Shipment(models.Model):
     shipment_started_email_sent_at = models.DateTimeField(null=True, blank=True)
     shipment_completed_email_sent_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            GinIndex(
+                OpClass(Upper("tracking_number"), name="gin_trgm_ops"),
+                name="shipment_tracking_trgm_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"Shipment #{self.pk}"
 
-    def save(self, *args, **kwargs):
+    def save(self, *args, apply_transition=True, **kwargs):
+        # orders.shipments queues emails through OutboundEmail, defined here
+        from .shipments import apply_shipment_transition
+
         is_new = self._state.adding
-        super().save(*args, **kwargs)
-
-        if is_new:
-            return
-
-        self.refresh_from_db()
-
-        if self.artworks.all().count() == 0:
-            raise ValidationError("Shipment must have at least one artwork")
-
-        # Send emails if they haven't been sent yet
-        if self.shipment_started_email_sent_at is None:
-            send_shipment_started(self.order, self)
-            self.shipment_started_email_sent_at = timezone.now()
-            super().save(update_fields=["shipment_started_email_sent_at"])
-        if self.status == "delivered" and self.shipment_completed_email_sent_at is None:
-            send_shipment_completed(self.order, self)
-            self.shipment_completed_email_sent_at = timezone.now()
-            super().save(update_fields=["shipment_completed_email_sent_at"])
-
-        # Update order status
-        unshipped_order_artworks = self.order.artworks.filter(shipment__isnull=True)
-        if self.order.status == "processing" and unshipped_order_artworks.count() == 0:
-            self.order.status = "shipped"
-            self.order.save()
-        elif self.order.shipments.exclude(status="delivered").count() == 0:
-            self.order.status = "completed"
-            self.order.save()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # New shipments have no artworks yet; use orders.shipments.save_shipment
+            # to save a shipment together with its artworks.
+            if apply_transition and not is_new and not kwargs.get("update_fields"):
+                apply_shipment_transition(self)
+
+
+class OrderStatusSnapshot(models.Model):
+    """
+    What the public order tracking endpoint shows for an order, denormalized
+    into one row so lookups never join the order's artworks and shipments.
+    Rebuilt by orders.status.refresh_order_status whenever the order changes.
+    """
+
+    order = models.OneToOneField(
+        Order,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="status_snapshot",
+    )
+    customer_email = models.EmailField()
+    data = models.JSONField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Status of order {self.order_id}"
+
+
+class OutboundEmail(models.Model):
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    idempotency_key = models.CharField(max_length=200, unique=True)
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=200)
+    text = models.TextField()
+    html = models.TextField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(status="pending"),
+                name="outbound_email_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {self.to_email}"
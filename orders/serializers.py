@@ -1,9 +1,50 @@
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
 
+from artwork.models import Artwork, Image
 from artwork.serializers import ArtworkSerializer
 from .models import Order, Payment, Shipment
 
 
+def _artworks_prefetch(lookup):
+    # ArtworkSerializer reads `images` for a detail, but only `main_image` for
+    # a "list" action, so both come with their derivatives.
+    return Prefetch(
+        lookup,
+        queryset=Artwork.objects.select_related("main_image").prefetch_related(
+            Prefetch(
+                "images",
+                queryset=Image.objects.prefetch_related("derivatives").order_by(
+                    "-is_main_image", "id"
+                ),
+            ),
+            "main_image__derivatives",
+        ),
+    )
+
+
+# Everything OrderSerializer reads, loaded in a fixed number of queries however
+# many orders, artworks and shipments there are. The payment is joined by
+# get_order_queryset, or fetched in one more query by prefetch_order_details.
+ORDER_DETAIL_PREFETCH = [
+    _artworks_prefetch("artworks"),
+    Prefetch("shipments", queryset=Shipment.objects.order_by("created_at", "id")),
+    _artworks_prefetch("shipments__artworks"),
+]
+
+
+def get_order_queryset():
+    return Order.objects.select_related("payment").prefetch_related(
+        *ORDER_DETAIL_PREFETCH
+    )
+
+
+def prefetch_order_details(orders):
+    """Load the details of already fetched orders for OrderSerializer."""
+    prefetch_related_objects(orders, "payment", *ORDER_DETAIL_PREFETCH)
+    return orders
+
+
 class OrderSerializer(serializers.ModelSerializer):
     artworks = serializers.SerializerMethodField()
     shipments = serializers.SerializerMethodField()
@@ -15,7 +56,11 @@ class OrderSerializer(serializers.ModelSerializer):
         ).data
 
     def get_payment(self, obj):
-        return PaymentSerializer(obj.payment, context=self.context).data
+        try:
+            payment = obj.payment
+        except Payment.DoesNotExist:
+            return None
+        return PaymentSerializer(payment, context=self.context).data
 
     def get_shipments(self, obj):
         return ShipmentSerializer(
@@ -43,4 +88,4 @@ class ShipmentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Shipment
-        fields = "__all__"
\ No newline at end of file
+        fields = "__all__"
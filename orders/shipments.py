@@ -0,0 +1,101 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from artwork.models import Artwork
+from utils.order_emails import send_shipment_completed, send_shipment_started
+from .models import Order, Shipment
+from .status import refresh_order_status
+
+
+def next_order_status(status, unshipped, undelivered):
+    """Order status once every artwork is shipped, or every shipment delivered."""
+    if status not in ("processing", "shipped") or unshipped:
+        return status
+    return "completed" if undelivered == 0 else "shipped"
+
+
+def assign_artworks(shipment, artworks):
+    """
+    Make `artworks` the contents of `shipment` with two UPDATEs, one for the
+    selected artworks and one for those no longer selected.
+    """
+    artwork_ids = [artwork.pk for artwork in artworks]
+    Artwork.objects.assign_to_shipment(shipment, artwork_ids)
+    Artwork.objects.filter(shipment=shipment).exclude(pk__in=artwork_ids).update(
+        shipment=None
+    )
+
+
+def apply_shipment_transition(shipment):
+    """
+    Queue the shipment's emails, move its order forward and rebuild the
+    order's status snapshot.
+
+    Reads everything it needs about the order in one aggregate query, queues
+    each email at most once (the outbox also deduplicates by shipment), and
+    writes the email timestamps and the order status with one UPDATE each.
+    The snapshot reads the order's artworks and shipments with one query each.
+    """
+    state = (
+        Order.objects.filter(pk=shipment.order_id)
+        .annotate(
+            shipment_artworks=Count(
+                "artworks", filter=Q(artworks__shipment=shipment), distinct=True
+            ),
+            unshipped=Count(
+                "artworks", filter=Q(artworks__shipment__isnull=True), distinct=True
+            ),
+            undelivered=Count(
+                "shipments", filter=~Q(shipments__status="delivered"), distinct=True
+            ),
+        )
+        .values("status", "shipment_artworks", "unshipped", "undelivered")
+        .get()
+    )
+    if state["shipment_artworks"] == 0:
+        raise ValidationError("Shipment must have at least one artwork")
+
+    now = timezone.now()
+    sent = {}
+    if shipment.shipment_started_email_sent_at is None:
+        send_shipment_started(shipment.order, shipment)
+        sent["shipment_started_email_sent_at"] = now
+    if (
+        shipment.status == "delivered"
+        and shipment.shipment_completed_email_sent_at is None
+    ):
+        send_shipment_completed(shipment.order, shipment)
+        sent["shipment_completed_email_sent_at"] = now
+    if sent:
+        Shipment.objects.filter(pk=shipment.pk).update(**sent)
+        for name, value in sent.items():
+            setattr(shipment, name, value)
+
+    status = next_order_status(
+        state["status"], state["unshipped"], state["undelivered"]
+    )
+    if status != state["status"]:
+        Order.objects.filter(pk=shipment.order_id).update(status=status)
+        if Shipment.order.is_cached(shipment):
+            shipment.order.status = status
+
+    refresh_order_status(shipment.order)
+
+
+def save_shipment(shipment, artworks=None):
+    """
+    Save a shipment, replace its artworks if `artworks` is given, then apply
+    its side effects once.
+
+    New shipments saved without artworks are only stored, like Shipment.save.
+    """
+    with transaction.atomic():
+        is_new = shipment._state.adding
+        shipment.save(apply_transition=False)
+        if artworks is not None:
+            assign_artworks(shipment, artworks)
+        if not is_new or artworks is not None:
+            apply_shipment_transition(shipment)
+    return shipment
@@ -0,0 +1,116 @@
+"""
+Read model behind the public order tracking endpoint.
+
+Each order's status, artworks and shipments are denormalized into one
+OrderStatusSnapshot row whenever fulfill_order, a shipment or the order admin
+changes them. Tracking requests read that single row by primary key, so they
+never join the order's artworks and shipments. Because the row is the only
+copy, every process sees a change as soon as it commits.
+"""
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from rest_framework import serializers
+
+from artwork.models import Artwork
+from .models import Order, OrderStatusSnapshot, Shipment
+
+ARTWORK_FIELDS = ["id", "title", "shipment_id"]
+
+# Formatted the same way as the rest of the API
+_datetime = serializers.DateTimeField()
+_date = serializers.DateField()
+
+
+def build_order_status(order, artworks, shipments):
+    """Return the tracking payload for `order`, its artworks and shipments."""
+    return {
+        "id": str(order.pk),
+        "status": order.status,
+        "created_at": _datetime.to_representation(order.created_at),
+        "artworks": [
+            {
+                "id": str(artwork.pk),
+                "title": artwork.title,
+                "shipped": artwork.shipment_id is not None,
+            }
+            for artwork in artworks
+        ],
+        "shipments": [
+            {
+                "id": shipment.pk,
+                "status": shipment.status,
+                "shipping_via": shipment.shipping_via,
+                "tracking_number": shipment.tracking_number,
+                "tracking_url": shipment.tracking_url,
+                "expected_delivery_days": shipment.expected_delivery_days,
+                "expected_delivery_date": _date.to_representation(
+                    shipment.expected_delivery_date
+                ),
+                "shipped_at": _datetime.to_representation(shipment.created_at),
+                "artworks": [
+                    str(artwork.pk)
+                    for artwork in artworks
+                    if artwork.shipment_id == shipment.pk
+                ],
+            }
+            for shipment in shipments
+        ],
+        "updated_at": _datetime.to_representation(timezone.now()),
+    }
+
+
+def refresh_order_status(order, artworks=None, shipments=None):
+    """
+    Rebuild and store the status snapshot of `order` with one upsert.
+
+    Callers that already hold the order's artworks or shipments can pass them
+    in to skip fetching them; otherwise each is one query on its own table.
+    """
+    if artworks is None:
+        artworks = Artwork.objects.filter(order_id=order.pk).only(*ARTWORK_FIELDS)
+    if shipments is None:
+        shipments = Shipment.objects.filter(order_id=order.pk)
+    artworks = sorted(artworks, key=lambda artwork: (artwork.title, str(artwork.pk)))
+    shipments = sorted(
+        shipments, key=lambda shipment: (shipment.created_at, shipment.pk)
+    )
+
+    data = build_order_status(order, artworks, shipments)
+    OrderStatusSnapshot.objects.bulk_create(
+        [
+            OrderStatusSnapshot(
+                order_id=order.pk, customer_email=order.customer_email, data=data
+            )
+        ],
+        update_conflicts=True,
+        unique_fields=["order"],
+        update_fields=["customer_email", "data", "updated_at"],
+    )
+    return data
+
+
+def get_order_status(order_id, email):
+    """
+    Return the status payload of the order if `email` is the one it was placed
+    with (ignoring case), else None, so unknown orders and wrong emails can't
+    be told apart.
+    """
+    snapshot = (
+        OrderStatusSnapshot.objects.filter(order_id=order_id)
+        .values("customer_email", "data")
+        .first()
+    )
+    if snapshot is None:
+        # Orders placed before snapshots existed get theirs on first lookup
+        order = Order.objects.filter(pk=order_id).first()
+        if order is None:
+            return None
+        snapshot = {
+            "customer_email": order.customer_email,
+            "data": refresh_order_status(order),
+        }
+
+    expected = snapshot["customer_email"].lower()
+    if not email or not constant_time_compare(expected, email.strip().lower()):
+        return None
+    return snapshot["data"]
@@ -1,3 +1,538 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import requests
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from artwork.models import Artwork, Image
+from portfolio.tests.factories import create_artwork, create_order, create_payment
+from utils.email_outbox import MAX_ATTEMPTS, deliver_due_emails, enqueue_email
+from utils.fake_mailgun import DROP, FakeMailgunServer
+from utils.mailgun import MAX_RETRY_AFTER, get_mailgun_metrics, send_mailgun_email
+from utils.order_emails import render_order_emails, send_order_confirmation
+from .models import Order, OrderStatusSnapshot, OutboundEmail, Payment, Shipment
+from .serializers import OrderSerializer, get_order_queryset, prefetch_order_details
+from .shipments import next_order_status, save_shipment
+
+
+class EmailOutboxTestCase(TestCase):
+    def setUp(self):
+        self.server = FakeMailgunServer().start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(MAILGUN_API_URL=self.server.url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_order_email_is_queued_once(self):
+        order = create_order()
+        create_artwork(order=order)
+
+        send_order_confirmation(order)
+        send_order_confirmation(order)
+
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.status, "pending")
+        self.assertEqual(email.idempotency_key, f"order:{order.pk}:order_confirmation")
+        self.assertIn("Test Artwork", email.text)
+        self.assertEqual(self.server.requests, 0)
+
+    def test_worker_sends_due_emails(self):
+        enqueue_email("test:1", "Subject", "Body", "buyer@example.com")
+
+        self.assertEqual(deliver_due_emails(), (1, 0))
+        self.assertEqual(deliver_due_emails(), (0, 0))
+
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.status, "sent")
+        self.assertIsNotNone(email.sent_at)
+        self.assertEqual(len(self.server.messages), 1)
+        self.assertEqual(self.server.messages[0]["subject"], "Subject")
+        self.assertEqual(self.server.messages[0]["to"], "buyer@example.com")
+
+    def test_failures_back_off_and_give_up(self):
+        enqueue_email("test:1", "Subject", "Body", "buyer@example.com")
+        email = OutboundEmail.objects.get(idempotency_key="test:1")
+        self.server.responses = [400] * MAX_ATTEMPTS
+
+        before = timezone.now()
+        self.assertEqual(deliver_due_emails(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.status, "pending")
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.next_attempt_at, before + timedelta(seconds=29))
+
+        # Not due yet
+        self.assertEqual(deliver_due_emails(), (0, 0))
+
+        for _ in range(MAX_ATTEMPTS - 1):
+            OutboundEmail.objects.update(next_attempt_at=timezone.now())
+            deliver_due_emails()
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, "failed")
+        self.assertEqual(email.attempts, MAX_ATTEMPTS)
+        self.assertEqual(self.server.messages, [])
+
+
+class MailgunClientTestCase(TestCase):
+    def setUp(self):
+        self.server = FakeMailgunServer().start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(MAILGUN_API_URL=self.server.url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_connections_are_reused(self):
+        for i in range(3):
+            send_mailgun_email(f"Subject {i}", "Body", "buyer@example.com")
+
+        self.assertEqual(len(self.server.messages), 3)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_retries_server_errors(self):
+        self.server.responses = [503, 429]
+        before = get_mailgun_metrics()
+
+        send_mailgun_email("Subject", "Body", "buyer@example.com")
+
+        self.assertEqual(self.server.requests, 3)
+        self.assertEqual(len(self.server.messages), 1)
+        after = get_mailgun_metrics()
+        self.assertEqual(after["requests"], before["requests"] + 1)
+        self.assertEqual(after["errors"], before["errors"])
+
+    def test_dropped_responses_are_not_resent(self):
+        self.server.responses = [DROP]
+
+        with self.assertRaises(requests.ConnectionError):
+            send_mailgun_email("Subject", "Body", "buyer@example.com")
+
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(len(self.server.messages), 1)
+
+    def test_retry_after_is_capped(self):
+        self.server.responses = [503]
+        self.server.retry_after = 3600
+
+        with mock.patch("urllib3.util.retry.time.sleep") as sleep:
+            send_mailgun_email("Subject", "Body", "buyer@example.com")
+
+        sleep.assert_called_once_with(MAX_RETRY_AFTER)
+        self.assertEqual(len(self.server.messages), 1)
+
+    def test_ambiguous_server_errors_are_not_retried(self):
+        for status_code in [500, 502, 504]:
+            self.server.requests = 0
+            self.server.responses = [status_code]
+
+            with self.assertRaises(Exception):
+                send_mailgun_email("Subject", "Body", "buyer@example.com")
+
+            self.assertEqual(self.server.requests, 1)
+
+    def test_client_errors_are_not_retried(self):
+        self.server.responses = [400]
+        before = get_mailgun_metrics()
+
+        with self.assertRaises(Exception):
+            send_mailgun_email("Subject", "Body", "buyer@example.com")
+
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(get_mailgun_metrics()["errors"], before["errors"] + 1)
+
+
+class OrderEmailRenderingTestCase(TestCase):
+    def create_order_with_artworks(self, index, count):
+        order = create_order(
+            stripe_session_id=f"cs_{index}", stripe_payment_intent_id=f"pi_{index}"
+        )
+        for i in range(count):
+            artwork = create_artwork(title=f"Artwork {index}-{i}", order=order)
+            Image.objects.create(
+                artwork=artwork, image=f"artwork/{index}-{i}.jpg", width=10, height=10
+            )
+            Image.objects.create(
+                artwork=artwork,
+                image=f"artwork/{index}-{i}-main.jpg",
+                is_main_image=True,
+                width=10,
+                height=10,
+            )
+        return order
+
+    def count_queries(self, func, *args):
+        with CaptureQueriesContext(connection) as context:
+            func(*args)
+        return len(context.captured_queries)
+
+    def test_confirmation_query_count_is_constant(self):
+        small = self.create_order_with_artworks(1, 1)
+        large = self.create_order_with_artworks(2, 5)
+
+        self.assertEqual(
+            self.count_queries(send_order_confirmation, Order.objects.get(pk=small.pk)),
+            self.count_queries(send_order_confirmation, Order.objects.get(pk=large.pk)),
+        )
+
+        email = OutboundEmail.objects.get(idempotency_key__contains=str(large.pk))
+        self.assertIn("/media/artwork/2-0-main.jpg", email.html)
+
+    def test_render_many_orders(self):
+        orders = [self.create_order_with_artworks(i, 2) for i in range(3)]
+
+        with self.assertNumQueries(3):
+            rendered = render_order_emails(
+                Order.objects.filter(pk__in=[o.pk for o in orders]),
+                "order_confirmation",
+            )
+
+        self.assertEqual(len(rendered), 3)
+        for order, text, html in rendered:
+            self.assertIn(f"Artwork {order.stripe_session_id[3:]}-", text)
+            self.assertIn("-main.jpg", html)
+
+
+class ShipmentTransitionTestCase(TestCase):
+    def setUp(self):
+        self.order = create_order()
+        self.artworks = [
+            create_artwork(title=f"Artwork {i}", order=self.order) for i in range(3)
+        ]
+
+    def emails(self):
+        return sorted(OutboundEmail.objects.values_list("idempotency_key", flat=True))
+
+    def test_shipping_everything(self):
+        shipment = save_shipment(
+            Shipment(order=self.order, shipping_via="USPS"), self.artworks
+        )
+
+        self.assertEqual(
+            Artwork.objects.filter(shipment=shipment).count(), len(self.artworks)
+        )
+        self.assertEqual(self.emails(), [f"shipment:{shipment.pk}:order_shipped"])
+        self.assertIsNotNone(
+            Shipment.objects.get(pk=shipment.pk).shipment_started_email_sent_at
+        )
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, "shipped")
+
+        # Saving again doesn't queue anything new
+        save_shipment(shipment, self.artworks)
+        self.assertEqual(len(self.emails()), 1)
+
+        shipment.status = "delivered"
+        save_shipment(shipment, self.artworks)
+        self.assertEqual(
+            self.emails(),
+            [
+                f"shipment:{shipment.pk}:order_delivered",
+                f"shipment:{shipment.pk}:order_shipped",
+            ],
+        )
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, "completed")
+
+    def test_partial_shipment(self):
+        shipment = save_shipment(
+            Shipment(order=self.order, shipping_via="USPS", status="delivered"),
+            self.artworks[:1],
+        )
+
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, "processing")
+
+        # Deselected artworks are removed from the shipment
+        save_shipment(shipment, self.artworks[1:])
+        self.assertEqual(
+            set(Artwork.objects.filter(shipment=shipment)), set(self.artworks[1:])
+        )
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, "processing")
+
+    def test_shipment_email_lists_its_artworks(self):
+        Image.objects.create(
+            artwork=self.artworks[0],
+            image="artwork/shipped.jpg",
+            width=10,
+            height=10,
+            is_main_image=True,
+        )
+
+        save_shipment(
+            Shipment(order=self.order, shipping_via="USPS"), self.artworks[:1]
+        )
+
+        email = OutboundEmail.objects.get()
+        self.assertIn("Artwork 0", email.text)
+        self.assertNotIn("Artwork 1", email.text)
+        self.assertIn("multiple packages", email.text)
+        self.assertIn("/media/artwork/shipped.jpg", email.html)
+
+    def test_rejects_empty_and_foreign_artworks(self):
+        other = create_artwork(
+            order=create_order(
+                stripe_session_id="cs_other", stripe_payment_intent_id="pi_other"
+            )
+        )
+
+        with self.assertRaises(ValidationError):
+            save_shipment(Shipment(order=self.order, shipping_via="USPS"), [])
+        with self.assertRaises(ValidationError):
+            save_shipment(Shipment(order=self.order, shipping_via="USPS"), [other])
+
+        self.assertFalse(Shipment.objects.exists())
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_query_count_is_constant_in_artworks(self):
+        def count(artworks):
+            order = create_order(
+                stripe_session_id=f"cs_{len(artworks)}",
+                stripe_payment_intent_id=f"pi_{len(artworks)}",
+            )
+            Artwork.objects.filter(pk__in=[a.pk for a in artworks]).update(
+                order=order
+            )
+            shipment = Shipment(order=order, shipping_via="USPS")
+            with CaptureQueriesContext(connection) as context:
+                save_shipment(shipment, artworks)
+            return len(context.captured_queries)
+
+        one = count(self.artworks[:1])
+        three = count([create_artwork(title=f"Other {i}") for i in range(3)])
+
+        self.assertEqual(one, three)
+
+    def test_next_order_status(self):
+        self.assertEqual(next_order_status("processing", 1, 0), "processing")
+        self.assertEqual(next_order_status("processing", 0, 1), "shipped")
+        self.assertEqual(next_order_status("processing", 0, 0), "completed")
+        self.assertEqual(next_order_status("shipped", 0, 0), "completed")
+        self.assertEqual(next_order_status("refunded", 0, 0), "refunded")
+
+
+class AdminChangelistQueryCountTestCase(TestCase):
+    def setUp(self):
+        admin_user = User.objects.create_superuser("admin", password="pw")
+        self.client.force_login(admin_user)
+        self.index = 0
+
+    def create_sale(self):
+        self.index += 1
+        order = create_order(
+            stripe_session_id=f"cs_{self.index}",
+            stripe_payment_intent_id=f"pi_{self.index}",
+            customer_email=f"buyer{self.index}@example.com",
+        )
+        create_payment(order)
+        shipment = Shipment.objects.create(order=order, shipping_via="USPS")
+        for _ in range(2):
+            create_artwork(order=order, shipment=shipment)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_changelists_are_constant(self):
+        urls = [
+            "/admin/orders/order/",
+            "/admin/orders/payment/",
+            "/admin/orders/shipment/",
+            "/admin/orders/order/?q=buyer",
+        ]
+        self.create_sale()
+        small = [self.count_queries(url) for url in urls]
+        for _ in range(3):
+            self.create_sale()
+        large = [self.count_queries(url) for url in urls]
+
+        self.assertEqual(small, large)
+
+    def test_artwork_counts(self):
+        self.create_sale()
+        response = self.client.get("/admin/orders/order/")
+        self.assertEqual(response.context["cl"].result_list[0].artwork_count, 2)
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN output is PostgreSQL specific")
+class AdminSearchIndexTestCase(TestCase):
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, plan)
+
+    def test_search_indexes(self):
+        self.assertUsesIndex(
+            Order.objects.filter(customer_email__icontains="buyer"),
+            "order_email_trgm_idx",
+        )
+        self.assertUsesIndex(
+            Order.objects.filter(shipping_postal_code__icontains="802"),
+            "order_postal_code_trgm_idx",
+        )
+        self.assertUsesIndex(
+            Shipment.objects.filter(tracking_number__icontains="9400"),
+            "shipment_tracking_trgm_idx",
+        )
+        self.assertUsesIndex(
+            Payment.objects.filter(stripe_payment_intent_id__iexact="pi_test"),
+            "payment_intent_upper_idx",
+        )
+
+
+class OrderSerializerQueryCountTestCase(TestCase):
+    def create_order(self, index, artworks, shipments):
+        order = create_order(
+            stripe_session_id=f"cs_{index}", stripe_payment_intent_id=f"pi_{index}"
+        )
+        create_payment(order)
+        created = []
+        for i in range(artworks):
+            artwork = create_artwork(title=f"Artwork {index}-{i}", order=order)
+            for j in range(2):
+                Image.objects.create(
+                    artwork=artwork,
+                    image=f"artwork/{index}-{i}-{j}.jpg",
+                    width=10,
+                    height=10,
+                    is_main_image=j == 0,
+                )
+            created.append(artwork)
+        for i in range(shipments):
+            shipment = Shipment.objects.create(order=order, shipping_via="USPS")
+            Artwork.objects.assign_to_shipment(shipment, created[i::shipments])
+        return order
+
+    def serialize(self, order_ids, context=None):
+        # Orders with their payment, then artworks, images, their derivatives
+        # and the main images' derivatives for the order and again for its
+        # shipments, plus the shipments
+        with self.assertNumQueries(10):
+            return OrderSerializer(
+                get_order_queryset().filter(pk__in=order_ids),
+                many=True,
+                context=context or {},
+            ).data
+
+    def test_query_count_is_constant(self):
+        small = self.create_order(1, artworks=1, shipments=1)
+        large = self.create_order(2, artworks=4, shipments=2)
+
+        (data,) = self.serialize([small.pk])
+        self.assertEqual(len(data["artworks"]), 1)
+
+        data = self.serialize([small.pk, large.pk])
+        large_data = next(item for item in data if item["id"] == str(large.pk))
+        self.assertEqual(len(large_data["artworks"]), 4)
+        self.assertEqual(
+            [len(shipment["artworks"]) for shipment in large_data["shipments"]],
+            [2, 2],
+        )
+        self.assertEqual(large_data["payment"]["stripe_payment_intent_id"], "pi_2")
+        self.assertTrue(large_data["artworks"][0]["images"][0]["is_main_image"])
+
+    def test_list_action_reads_prefetched_main_images(self):
+        orders = [self.create_order(i, artworks=3, shipments=1) for i in range(2)]
+
+        data = self.serialize(
+            [order.pk for order in orders], {"view": mock.Mock(action="list")}
+        )
+        images = data[0]["artworks"][0]["images"]
+        self.assertEqual(len(images), 1)
+        self.assertTrue(images[0]["is_main_image"])
+
+    def test_prefetch_loaded_orders(self):
+        order = Order.objects.get(pk=self.create_order(1, artworks=2, shipments=1).pk)
+        Payment.objects.filter(order=order).delete()
+
+        prefetch_order_details([order])
+        with self.assertNumQueries(0):
+            data = OrderSerializer(order).data
+
+        self.assertIsNone(data["payment"])
+        self.assertEqual(len(data["shipments"][0]["artworks"]), 2)
+
+
+class OrderStatusTestCase(TestCase):
+    def setUp(self):
+        # Resets the anonymous throttle history
+        cache.clear()
+        self.order = create_order(customer_email="Buyer@Example.com")
+        self.artworks = [
+            create_artwork(title=f"Artwork {i}", order=self.order) for i in range(2)
+        ]
+
+    def track(self, email="buyer@example.com", order_id=None):
+        return self.client.get(
+            f"/api/orders/{order_id or self.order.pk}/status/", {"email": email}
+        )
+
+    def test_lookup_requires_matching_email(self):
+        response = self.track(" BUYER@example.com")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], "processing")
+        self.assertEqual(
+            [artwork["title"] for artwork in response.data["artworks"]],
+            ["Artwork 0", "Artwork 1"],
+        )
+
+        self.assertEqual(self.track("other@example.com").status_code, 404)
+        self.assertEqual(self.track("").status_code, 404)
+        self.assertEqual(
+            self.track(order_id="00000000-0000-0000-0000-000000000000").status_code,
+            404,
+        )
+
+    def test_artwork_edits_rebuild_the_snapshot(self):
+        other_order = create_order(
+            stripe_session_id="cs_other", stripe_payment_intent_id="pi_other"
+        )
+        self.track()
+
+        artwork = Artwork.objects.get(pk=self.artworks[0].pk)
+        artwork.title = "Renamed"
+        artwork.save()
+        self.assertEqual(
+            [artwork["title"] for artwork in self.track().data["artworks"]],
+            ["Artwork 1", "Renamed"],
+        )
+
+        # Moving an artwork rebuilds the order it left as well
+        artwork.order = other_order
+        artwork.save()
+        self.assertEqual(
+            [artwork["title"] for artwork in self.track().data["artworks"]],
+            ["Artwork 1"],
+        )
+        snapshot = OrderStatusSnapshot.objects.get(order=other_order)
+        self.assertEqual(
+            [artwork["title"] for artwork in snapshot.data["artworks"]], ["Renamed"]
+        )
+
+    def test_shipments_rebuild_the_snapshot(self):
+        self.assertEqual(self.track().data["status"], "processing")
+
+        save_shipment(
+            Shipment(order=self.order, shipping_via="USPS", tracking_number="9400"),
+            self.artworks,
+        )
+
+        # Lookups read the rebuilt row straight away, and only that row
+        with CaptureQueriesContext(connection) as context:
+            response = self.track()
+        (query,) = context.captured_queries
+        self.assertIn("orders_orderstatussnapshot", query["sql"])
+        self.assertEqual(response.data["status"], "shipped")
+        (shipment,) = response.data["shipments"]
+        self.assertEqual(shipment["tracking_number"], "9400")
+        self.assertEqual(len(shipment["artworks"]), 2)
+        self.assertTrue(
+            all(artwork["shipped"] for artwork in response.data["artworks"])
+        )
@@ -0,0 +1,32 @@
+from rest_framework import status, views
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.throttling import AnonRateThrottle
+
+from .status import get_order_status
+
+
+class OrderStatusThrottle(AnonRateThrottle):
+    # Its own scope, so tracking lookups don't use up the checkout allowance
+    scope = "order_status"
+    rate = "30/min"
+
+
+class OrderStatusView(views.APIView):
+    """
+    Read-only order tracking for customers: the order id from their
+    confirmation email plus the email address the order was placed with.
+    """
+
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    throttle_classes = [OrderStatusThrottle]
+
+    def get(self, request, order_id, *args, **kwargs):
+        data = get_order_status(order_id, request.query_params.get("email", ""))
+        if data is None:
+            return Response(
+                {"detail": "No order matches that id and email."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(data)
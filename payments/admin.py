@@ -0,0 +1,25 @@
+from django.contrib import admin
+
+from .models import ArtworkHold, StripeEvent
+
+
+class StripeEventAdmin(admin.ModelAdmin):
+    list_display = [
+        "__str__",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "stripe_created",
+        "processed_at",
+    ]
+    list_filter = ["status", "type"]
+    search_fields = ["event_id"]
+    readonly_fields = ["event_id", "type", "payload", "stripe_created", "received_at"]
+
+
+class ArtworkHoldAdmin(admin.ModelAdmin):
+    list_display = ["__str__", "stripe_session_id", "expires_at"]
+
+
+admin.site.register(StripeEvent, StripeEventAdmin)
+admin.site.register(ArtworkHold, ArtworkHoldAdmin)
@@ -0,0 +1,65 @@
+from django.db import transaction
+from django.utils import timezone
+
+from utils.email_outbox import retry_delay
+from .models import StripeEvent
+from .views import fulfill_order
+
+# Failed events are retried with the email outbox's backoff, and marked
+# failed once they have used up their attempts.
+MAX_ATTEMPTS = 8
+
+
+def process_event(event):
+    fulfill_order(event.type, event.payload["data"]["object"])
+
+
+def process_pending_events(limit=50):
+    """
+    Fulfill up to `limit` pending webhook events in the order Stripe created
+    them and return `(processed, failed)` counts.
+
+    Each event is locked while it is processed, so concurrent workers skip it.
+    A failed event rolls back its own changes, keeps the error and is retried
+    with backoff until MAX_ATTEMPTS.
+    """
+    processed = failed = 0
+    for _ in range(limit):
+        with transaction.atomic():
+            event = (
+                StripeEvent.objects.select_for_update(skip_locked=True)
+                .filter(status="pending", next_attempt_at__lte=timezone.now())
+                .order_by("stripe_created", "id")
+                .first()
+            )
+            if event is None:
+                break
+
+            event.attempts += 1
+            try:
+                with transaction.atomic():
+                    process_event(event)
+            except Exception as e:
+                event.last_error = f"{type(e).__name__}: {e}"
+                if event.attempts >= MAX_ATTEMPTS:
+                    event.status = "failed"
+                else:
+                    event.next_attempt_at = timezone.now() + retry_delay(
+                        event.attempts
+                    )
+                failed += 1
+            else:
+                event.status = "processed"
+                event.last_error = ""
+                processed += 1
+            event.processed_at = timezone.now()
+            event.save(
+                update_fields=[
+                    "status",
+                    "attempts",
+                    "next_attempt_at",
+                    "last_error",
+                    "processed_at",
+                ]
+            )
+    return processed, failed
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from payments.events import process_pending_events
+from payments.models import StripeEvent
+
+
+class Command(BaseCommand):
+    help = "Fulfill stored Stripe webhook events in the order they were created"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process whatever is pending and exit instead of polling",
+        )
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help=(
+                "Move events that used up their attempts back to pending before "
+                "processing"
+            ),
+        )
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between polls when there is nothing to do",
+        )
+
+    def handle(self, *args, **options):
+        if options["retry_failed"]:
+            retried = StripeEvent.objects.filter(status="failed").update(
+                status="pending", attempts=0, next_attempt_at=timezone.now()
+            )
+            self.stdout.write(f"Retrying {retried} failed events")
+
+        while True:
+            processed, failed = process_pending_events(limit=options["batch_size"])
+            if processed or failed:
+                self.stdout.write(f"Processed {processed} events, {failed} failed")
+
+            if options["once"]:
+                break
+            if processed + failed < options["batch_size"]:
+                time.sleep(options["interval"])
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from payments.models import ArtworkHold
+
+
+class Command(BaseCommand):
+    help = "Delete checkout holds on artworks whose Stripe session has expired"
+
+    def handle(self, *args, **options):
+        deleted, _ = ArtworkHold.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f"Released {deleted} expired holds"))
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.3 on 2026-10-17 16:15
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ("artwork", "0024_query_pattern_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArtworkHold",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("token", models.UUIDField(db_index=True, default=uuid.uuid4)),
+                (
+                    "stripe_session_id",
+                    models.CharField(blank=True, max_length=200, null=True),
+                ),
+                ("expires_at", models.DateTimeField(db_index=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "artwork",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="hold",
+                        to="artwork.artwork",
+                    ),
+                ),
+            ],
+        ),
+    ]
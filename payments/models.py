@@ -0,0 +1,55 @@
+import uuid
+from datetime import timedelta
+
+from django.db import models
+from django.utils import timezone
+
+from artwork.models import Artwork
+
+# Slightly longer than the 30 minute Stripe session, so a payment completed at
+# the last moment is still covered while its webhook is in flight.
+HOLD_DURATION = timedelta(minutes=35)
+
+
+class ArtworkHold(models.Model):
+    artwork = models.OneToOneField(
+        Artwork, on_delete=models.CASCADE, related_name="hold"
+    )
+    token = models.UUIDField(default=uuid.uuid4, db_index=True)
+    stripe_session_id = models.CharField(max_length=200, null=True, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Hold on {self.artwork_id} until {self.expires_at}"
+
+
+class StripeEvent(models.Model):
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("processed", "Processed"),
+        ("failed", "Failed"),
+    ]
+
+    event_id = models.CharField(max_length=255, unique=True)
+    type = models.CharField(max_length=100)
+    payload = models.JSONField()
+    stripe_created = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["stripe_created", "id"],
+                condition=models.Q(status="pending"),
+                name="stripe_event_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.type} ({self.event_id})"
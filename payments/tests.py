@@ -0,0 +1,435 @@
+import hashlib
+import hmac
+import io
+import json
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from artwork.models import Artwork
+from orders.models import Order, OrderStatusSnapshot, Payment
+from portfolio.tests.factories import create_artwork
+from utils.request_metrics import reset_route_metrics
+from .events import MAX_ATTEMPTS, process_event, process_pending_events
+from .models import ArtworkHold, StripeEvent
+from .views import create_order, fulfill_order, webhook_secret
+
+
+def checkout_session(product_ids, **kwargs):
+    session = {
+        "id": "cs_test",
+        "object": "checkout.session",
+        "payment_intent": "pi_test",
+        "payment_status": "paid",
+        "metadata": {"product_ids": ",".join(product_ids)},
+        "customer_details": {"email": "buyer@example.com"},
+        "shipping_details": {
+            "name": "Buyer",
+            "address": {
+                "line1": "1 Main St",
+                "city": "Denver",
+                "postal_code": "80202",
+                "state": "CO",
+                "country": "US",
+            },
+        },
+        "shipping_cost": {"shipping_rate": "shr_test"},
+        "total_details": {"amount_shipping": 1000},
+        "amount_subtotal": 50000,
+        "amount_total": 51000,
+        "currency": "usd",
+    }
+    session.update(kwargs)
+    return session
+
+
+def signed_event(event_id, event_type, session, created=None):
+    payload = json.dumps(
+        {
+            "id": event_id,
+            "object": "event",
+            "type": event_type,
+            "created": created or int(time.time()),
+            "data": {"object": session},
+        }
+    )
+    timestamp = int(time.time())
+    signature = hmac.new(
+        webhook_secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256
+    ).hexdigest()
+    return payload, f"t={timestamp},v1={signature}"
+
+
+class CheckoutHoldTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.artworks = [create_artwork(title=f"Artwork {i}") for i in range(2)]
+        self.product_ids = [str(artwork.id) for artwork in self.artworks]
+
+    def checkout(self, product_ids=None):
+        return self.client.post(
+            "/api/create-checkout-session/",
+            {"product_ids": product_ids or self.product_ids},
+            format="json",
+        )
+
+    def fake_session(self, **kwargs):
+        return SimpleNamespace(id="cs_test", url="https://checkout.stripe.test")
+
+    @mock.patch("payments.views.stripe.checkout.Session.create")
+    def test_stripe_is_called_outside_the_lock(self, create_session):
+        test_depth = len(connection.atomic_blocks)
+        depths = []
+
+        def create(**kwargs):
+            depths.append(len(connection.atomic_blocks))
+            # The hold is already committed by the time Stripe is called
+            self.assertEqual(ArtworkHold.objects.count(), 2)
+            return self.fake_session()
+
+        create_session.side_effect = create
+
+        response = self.checkout()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(depths, [test_depth])
+        holds = ArtworkHold.objects.all()
+        self.assertEqual({hold.stripe_session_id for hold in holds}, {"cs_test"})
+        metadata = create_session.call_args.kwargs["metadata"]
+        self.assertEqual(metadata["hold_token"], str(holds[0].token))
+
+    @mock.patch("payments.views.stripe.checkout.Session.create")
+    def test_held_artworks_are_unavailable(self, create_session):
+        create_session.side_effect = self.fake_session
+        self.checkout()
+
+        response = self.checkout(self.product_ids[:1])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(create_session.call_count, 1)
+
+    @mock.patch("payments.views.stripe.checkout.Session.create")
+    def test_expired_holds_are_replaced(self, create_session):
+        create_session.side_effect = self.fake_session
+        self.checkout()
+        ArtworkHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        response = self.checkout()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(ArtworkHold.objects.count(), 2)
+
+    @mock.patch("payments.views.stripe.checkout.Session.create")
+    def test_stripe_failure_releases_holds(self, create_session):
+        create_session.side_effect = Exception("Stripe is down")
+
+        response = self.checkout()
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ArtworkHold.objects.exists())
+
+    def test_create_order_consumes_holds(self):
+        ArtworkHold.objects.create(
+            artwork=self.artworks[0], expires_at=timezone.now() + timedelta(minutes=5)
+        )
+        session = checkout_session(self.product_ids[:1])
+        create_order(session)
+
+        self.assertFalse(ArtworkHold.objects.exists())
+
+    def test_release_expired_holds_command(self):
+        now = timezone.now()
+        ArtworkHold.objects.create(
+            artwork=self.artworks[0], expires_at=now - timedelta(minutes=1)
+        )
+        ArtworkHold.objects.create(
+            artwork=self.artworks[1], expires_at=now + timedelta(minutes=5)
+        )
+
+        call_command("release_expired_holds", stdout=io.StringIO())
+
+        self.assertEqual(
+            list(ArtworkHold.objects.values_list("artwork_id", flat=True)),
+            [self.artworks[1].id],
+        )
+
+
+class StripeWebhookTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.artwork = create_artwork()
+
+    def post_event(self, payload, signature):
+        return self.client.post(
+            "/api/stripe-webhook/",
+            payload,
+            content_type="application/json",
+            HTTP_STRIPE_SIGNATURE=signature,
+        )
+
+    def test_webhook_only_stores_the_event(self):
+        payload, signature = signed_event(
+            "evt_1",
+            "checkout.session.completed",
+            checkout_session([str(self.artwork.id)]),
+        )
+
+        with self.assertNumQueries(1):
+            response = self.post_event(payload, signature)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Stripe retries are deduplicated
+        response = self.post_event(payload, signature)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        event = StripeEvent.objects.get()
+        self.assertEqual(event.event_id, "evt_1")
+        self.assertEqual(event.status, "pending")
+        self.assertFalse(Order.objects.exists())
+
+    def test_bad_signature_is_rejected(self):
+        payload, _ = signed_event("evt_1", "checkout.session.completed", {})
+        response = self.post_event(payload, "t=1,v1=bad")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(StripeEvent.objects.exists())
+
+    def test_worker_processes_events_in_order(self):
+        session = checkout_session([str(self.artwork.id)])
+        now = int(time.time())
+        # Delivered out of order: the expiry of another session arrives first
+        # but was created later.
+        self.post_event(
+            *signed_event(
+                "evt_2",
+                "checkout.session.expired",
+                checkout_session([], id="cs_other", payment_intent=None),
+                created=now + 10,
+            )
+        )
+        self.post_event(
+            *signed_event("evt_1", "checkout.session.completed", session, created=now)
+        )
+
+        with mock.patch(
+            "payments.events.process_event", wraps=process_event
+        ) as wrapped:
+            self.assertEqual(process_pending_events(), (2, 0))
+        self.assertEqual(
+            [call.args[0].event_id for call in wrapped.call_args_list],
+            ["evt_1", "evt_2"],
+        )
+
+        order = Order.objects.get()
+        self.assertEqual(order.status, "processing")
+        self.assertTrue(Payment.objects.filter(order=order).exists())
+        self.artwork.refresh_from_db()
+        self.assertEqual(self.artwork.status, "sold")
+        self.assertEqual(
+            set(StripeEvent.objects.values_list("status", flat=True)), {"processed"}
+        )
+
+    def test_failed_events_are_retried_with_backoff(self):
+        self.post_event(
+            *signed_event(
+                "evt_1",
+                "checkout.session.completed",
+                checkout_session([str(self.artwork.id)]),
+            )
+        )
+
+        with mock.patch(
+            "payments.events.process_event", side_effect=DatabaseError("timeout")
+        ):
+            self.assertEqual(process_pending_events(), (0, 1))
+
+        event = StripeEvent.objects.get()
+        self.assertEqual((event.status, event.attempts), ("pending", 1))
+        self.assertIn("timeout", event.last_error)
+        self.assertGreater(event.next_attempt_at, timezone.now())
+        self.assertFalse(Order.objects.exists())
+
+        # Not due yet
+        self.assertEqual(process_pending_events(), (0, 0))
+
+        StripeEvent.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(process_pending_events(), (1, 0))
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ("processed", 2))
+        self.assertTrue(Order.objects.exists())
+
+    def test_failed_events_give_up_after_max_attempts(self):
+        self.artwork.status = "sold"
+        self.artwork.save()
+        self.post_event(
+            *signed_event(
+                "evt_1",
+                "checkout.session.completed",
+                checkout_session([str(self.artwork.id)]),
+            )
+        )
+        StripeEvent.objects.update(attempts=MAX_ATTEMPTS - 1)
+
+        self.assertEqual(process_pending_events(), (0, 1))
+
+        event = StripeEvent.objects.get()
+        self.assertEqual(event.status, "failed")
+        self.assertEqual(event.attempts, MAX_ATTEMPTS)
+        self.assertIn("no longer available", event.last_error)
+        self.assertFalse(Order.objects.exists())
+
+        call_command(
+            "process_stripe_events", once=True, retry_failed=True, stdout=io.StringIO()
+        )
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ("pending", 1))
+
+
+class FulfillOrderQueryCountTestCase(TestCase):
+    def setUp(self):
+        self.artworks = [create_artwork(title=f"Artwork {i}") for i in range(3)]
+        self.product_ids = [str(artwork.id) for artwork in self.artworks]
+
+    def fulfill(self, event_type, session):
+        with CaptureQueriesContext(connection) as context:
+            fulfill_order(event_type, session)
+        return [query["sql"] for query in context.captured_queries]
+
+    def selects_from(self, queries, table):
+        return [
+            sql
+            for sql in queries
+            if sql.startswith("SELECT") and f'FROM "{table}"' in sql
+        ]
+
+    def test_checkout_completed(self):
+        queries = self.fulfill(
+            "checkout.session.completed", checkout_session(self.product_ids)
+        )
+
+        self.assertEqual(len(self.selects_from(queries, "orders_order")), 1)
+        self.assertEqual(len(self.selects_from(queries, "artwork_artwork")), 1)
+        # Including the order status snapshot, built from the rows already loaded
+        self.assertEqual(len(queries), 12, "\n".join(queries))
+        self.assertTrue(
+            Payment.objects.filter(order__stripe_session_id="cs_test").exists()
+        )
+        self.assertEqual(OrderStatusSnapshot.objects.get().data["status"], "processing")
+
+        # A retried event finds the order and does nothing else
+        queries = self.fulfill(
+            "checkout.session.completed", checkout_session(self.product_ids)
+        )
+        self.assertEqual(len(queries), 1)
+
+    def test_checkout_completed_is_constant_in_artworks(self):
+        one = self.fulfill(
+            "checkout.session.completed", checkout_session(self.product_ids[:1])
+        )
+        Order.objects.all().delete()
+        Artwork.objects.update(status="available", order=None)
+
+        three = self.fulfill(
+            "checkout.session.completed",
+            checkout_session(
+                self.product_ids, id="cs_other", payment_intent="pi_other"
+            ),
+        )
+        self.assertEqual(len(one), len(three))
+
+    def test_async_payment_events(self):
+        for event_type, order_status in [
+            ("checkout.session.async_payment_succeeded", "processing"),
+            ("checkout.session.async_payment_failed", "failed"),
+        ]:
+            with self.subTest(event_type):
+                Order.objects.all().delete()
+                Artwork.objects.update(status="available", order=None)
+                fulfill_order(
+                    "checkout.session.completed",
+                    checkout_session(self.product_ids, payment_status="unpaid"),
+                )
+
+                queries = self.fulfill(event_type, checkout_session(self.product_ids))
+
+                self.assertEqual(len(self.selects_from(queries, "orders_order")), 1)
+                # Plus the artworks and shipments for the order status snapshot
+                self.assertEqual(len(queries), 8, "\n".join(queries))
+                order = Order.objects.get()
+                self.assertEqual(order.status, order_status)
+                self.assertEqual(
+                    order.payment.status,
+                    order_status.replace("processing", "succeeded"),
+                )
+
+    def test_checkout_expired(self):
+        queries = self.fulfill(
+            "checkout.session.expired", checkout_session(self.product_ids)
+        )
+        self.assertEqual(len(queries), 1)
+
+
+@override_settings(REQUEST_METRICS_ENABLED=True)
+class RequestMetricsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_route_metrics()
+        self.addCleanup(reset_route_metrics)
+        self.artwork = create_artwork()
+        self.client = APIClient()
+
+    def test_server_timing_header(self):
+        response = self.client.get("/api/artworks/")
+
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn("db-slowest;dur=", timing)
+        self.assertIn("serializer;dur=", timing)
+        self.assertIn("total;dur=", timing)
+
+    def test_route_histograms(self):
+        self.client.get("/api/artworks/")
+        self.client.get("/api/artworks/")
+        self.client.get("/api/health/")
+
+        admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_authenticate(admin)
+        response = self.client.get("/api/metrics/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        routes = response.data["routes"]
+        artworks = routes["GET /api/artworks/"]
+        self.assertEqual(artworks["count"], 2)
+        self.assertEqual(sum(artworks["histogram"].values()), 2)
+        self.assertGreater(artworks["queries"], 0)
+        self.assertIsNotNone(artworks["slowest_sql"])
+        self.assertEqual(routes["GET /api/health/"]["count"], 1)
+
+        self.client.get(f"/api/artworks/{self.artwork.pk}/")
+        response = self.client.get("/api/metrics/")
+        self.assertIn("GET /api/artworks/<pk>/", response.data["routes"])
+
+    def test_metrics_requires_admin(self):
+        response = self.client.get("/api/metrics/")
+
+        self.assertIn(
+            response.status_code,
+            [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN],
+        )
+
+    @override_settings(REQUEST_METRICS_ENABLED=False)
+    def test_disabled_by_default(self):
+        response = APIClient().get("/api/artworks/")
+
+        self.assertNotIn("Server-Timing", response)
@@ -1,7 +1,9 @@
+import json
 import stripe
 import time
 import uuid
 import warnings
+from datetime import datetime, timezone as dt_timezone
 
 from django.conf import settings
 from django.db import transaction
@@ -11,15 +13,18 @@ from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status, views
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.throttling import AnonRateThrottle
 
+from artwork.cache import bump_catalogue_version
 from artwork.models import Artwork
 from orders.models import Order, Payment
-from orders.serializers import OrderSerializer
-from utils.mailgun import send_mailgun_email
+from orders.status import refresh_order_status
+from .models import HOLD_DURATION, ArtworkHold, StripeEvent
+from utils.email_outbox import enqueue_email
 from utils.order_emails import send_order_confirmation
+from utils.request_metrics import get_route_metrics
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
 webhook_secret = settings.STRIPE_WEBHOOK_SECRET
@@ -39,6 +44,8 @@ class CreateCheckoutSessionView(views.APIView):
         try:
             product_ids = request.data["product_ids"]
 
+            # Only the local state change happens under the row locks. The
+            # artworks stay reserved by the hold while Stripe is called.
             with transaction.atomic():
                 products = Artwork.objects.select_for_update().filter(
                     id__in=product_ids
@@ -50,29 +57,54 @@ class CreateCheckoutSessionView(views.APIView):
                         status=status.HTTP_400_BAD_REQUEST,
                     )
 
-                unavailable = [p for p in products if p.status != "available"]
+                now = timezone.now()
+                ArtworkHold.objects.filter(
+                    artwork__in=products, expires_at__lte=now
+                ).delete()
+                held = set(
+                    ArtworkHold.objects.filter(artwork__in=products).values_list(
+                        "artwork_id", flat=True
+                    )
+                )
+
+                unavailable = [
+                    p for p in products if p.status != "available" or p.id in held
+                ]
                 if unavailable:
                     return Response(
                         f"Products {', '.join(str(p.id) for p in unavailable)} not available",
                         status=status.HTTP_400_BAD_REQUEST,
                     )
 
-                line_items = []
+                hold_token = uuid.uuid4()
+                ArtworkHold.objects.bulk_create(
+                    [
+                        ArtworkHold(
+                            artwork=product,
+                            token=hold_token,
+                            expires_at=now + HOLD_DURATION,
+                        )
+                        for product in products
+                    ]
+                )
 
-                for product in products:
-                    line_items.append(
-                        {
-                            "price_data": {
-                                "currency": "usd",
-                                "product_data": {"name": product.title},
-                                "unit_amount": product.price_cents,
-                            },
-                            "quantity": 1,
-                        }
-                    )
+            line_items = []
 
-                product_ids_str = ",".join(product_ids)
+            for product in products:
+                line_items.append(
+                    {
+                        "price_data": {
+                            "currency": "usd",
+                            "product_data": {"name": product.title},
+                            "unit_amount": product.price_cents,
+                        },
+                        "quantity": 1,
+                    }
+                )
+
+            product_ids_str = ",".join(product_ids)
 
+            try:
                 session = stripe.checkout.Session.create(
                     line_items=line_items,
                     shipping_address_collection={"allowed_countries": ["US", "CA"]},
@@ -96,34 +128,46 @@ class CreateCheckoutSessionView(views.APIView):
                     payment_method_types=["card"],
                     metadata={
                         "product_ids": product_ids_str,
+                        "hold_token": str(hold_token),
                         "created_at": str(timezone.now()),
                     },
                 )
+            except Exception:
+                release_holds(hold_token)
+                raise
+
+            ArtworkHold.objects.filter(token=hold_token).update(
+                stripe_session_id=session.id
+            )
         except Exception as e:
             return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
 
         return Response({"url": session.url}, status=status.HTTP_200_OK)
 
 
+def release_holds(hold_token):
+    if hold_token:
+        ArtworkHold.objects.filter(token=hold_token).delete()
+
+
 def create_order(session):
     payment_intent_id = session.get("payment_intent")
     session_id = session.get("id")
 
-    existing_order = Order.objects.filter(
-        Q(stripe_session_id=session_id) | Q(stripe_payment_intent_id=payment_intent_id)
-    ).first()
+    # The only order lookup for a checkout, served by the two unique indexes.
+    # A missing payment intent must not match every order with a NULL one.
+    lookup = Q(stripe_session_id=session_id)
+    if payment_intent_id:
+        lookup |= Q(stripe_payment_intent_id=payment_intent_id)
+    existing_order = Order.objects.filter(lookup).first()
 
     if existing_order:
-        return existing_order
+        return existing_order, False
 
     with transaction.atomic():
-        product_ids = [
-            uuid.UUID(id)
-            for id in session["metadata"].get("product_ids", "").split(",")
-            if id
-        ]
+        product_ids = get_product_ids(session)
 
-        artworks = Artwork.objects.select_for_update().filter(id__in=product_ids)
+        artworks = list(Artwork.objects.select_for_update().filter(id__in=product_ids))
 
         unavailable = [a for a in artworks if a.status != "available"]
         if unavailable:
@@ -156,37 +200,59 @@ def create_order(session):
             ),
         }
 
-        serializer = OrderSerializer(data=order_data)
-        serializer.is_valid(raise_exception=True)
-        order = serializer.save()
+        # Uniqueness was checked by the lookup above and is enforced by the
+        # database, so skip the per-field unique queries.
+        order = Order(**order_data)
+        order.full_clean(validate_unique=False)
+        order.save(force_insert=True)
 
         Artwork.objects.filter(id__in=product_ids).update(
             order=order, status="sold", sold_at=timezone.now()
         )
-
+        # update() bypasses the model signals, so invalidate cached artwork
+        # responses explicitly once the sale is committed.
+        transaction.on_commit(bump_catalogue_version)
+        ArtworkHold.objects.filter(artwork_id__in=product_ids).delete()
+        # A new order has no shipments, and its artworks were loaded above
+        refresh_order_status(order, artworks=artworks, shipments=[])
+
+        email_admin(session, [artwork.title for artwork in artworks])
         try:
-            send_order_confirmation(order)
+            send_order_confirmation(order, artworks)
         except Exception as e:
             warnings.warn(
                 f"Failed to send order confirmation email: {str(e)}", RuntimeWarning
             )
 
-    return order
+    return order, True
 
 
-def email_admin(session):
-    order_total_dollars = session.get("amount_total", 0) / 100
-    session_id = session.get("id", "N/A")
-
-    # Get product IDs and titles
-    product_ids = [
+def get_product_ids(session):
+    return [
         uuid.UUID(id)
-        for id in session["metadata"].get("product_ids", "").split(",")
+        for id in (session.get("metadata") or {}).get("product_ids", "").split(",")
         if id
     ]
-    products = Artwork.objects.filter(id__in=product_ids).values_list(
-        "title", flat=True
-    )
+
+
+def build_payment_data(session, order, status):
+    total_details = session.get("total_details", {}) or {}
+    shipping_cost = session.get("shipping_cost", {}) or {}
+    return {
+        "order": order,
+        "status": status,
+        "stripe_payment_intent_id": session.get("payment_intent"),
+        "subtotal_cents": session.get("amount_subtotal"),
+        "shipping_cents": total_details.get("amount_shipping", 0),
+        "shipping_stripe_id": shipping_cost.get("shipping_rate"),
+        "total_cents": session.get("amount_total"),
+        "currency": session.get("currency"),
+    }
+
+
+def email_admin(session, titles):
+    order_total_dollars = session.get("amount_total", 0) / 100
+    session_id = session.get("id", "N/A")
 
     message = f"""
 You have received an order.
@@ -202,7 +268,7 @@ Order ID: {session_id}
 
 Artworks:
 ---------
-{chr(10).join(f'- {product}' for product in products)}
+{chr(10).join(f'- {title}' for title in titles)}
 
 
 
@@ -227,7 +293,8 @@ Emails are sent to the customer on these three events:
 """
 
     try:
-        send_mailgun_email(
+        enqueue_email(
+            f"stripe-session:{session_id}:admin",
             "Order Received",
             message,
             settings.ADMIN_EMAIL,
@@ -237,57 +304,41 @@ Emails are sent to the customer on these three events:
 
 
 def fulfill_order(event_type, session):
-    payment_intent_id = session.get("payment_intent")
-
-    try:
-        if event_type == "checkout.session.completed":
-            email_admin(session)
-            order = create_order(session)
-
-            payment_data = {
-                "stripe_payment_intent_id": session.get("payment_intent"),
-                "subtotal_cents": session.get("amount_subtotal"),
-                "shipping_cents": session.get("total_details", {}).get(
-                    "amount_shipping", 0
-                ),
-                "shipping_stripe_id": session.get("shipping_cost", {}).get(
-                    "shipping_rate"
-                ),
-                "total_cents": session.get("amount_total"),
-                "currency": session.get("currency"),
-            }
-
-            if session.get("payment_status") == "paid":
-                order = Order.objects.get(stripe_payment_intent_id=payment_intent_id)
-                payment_data["order"] = order
-                payment_data["status"] = "succeeded"
-                Payment.objects.create(**payment_data)
-
-        elif event_type in [
-            "checkout.session.async_payment_succeeded",
-            "checkout.session.async_payment_failed",
-        ]:
-            with transaction.atomic():
-                order = Order.objects.get(stripe_payment_intent_id=payment_intent_id)
-                order.status = "processing" if "succeeded" in event_type else "failed"
-                order.save()
+    # Raises on failure so the process_stripe_events worker can record it.
+    # Each event type does at most one order lookup.
+    if event_type == "checkout.session.completed":
+        order, created = create_order(session)
+
+        if created and session.get("payment_status") == "paid":
+            Payment.objects.create(**build_payment_data(session, order, "succeeded"))
+
+    elif event_type in [
+        "checkout.session.async_payment_succeeded",
+        "checkout.session.async_payment_failed",
+    ]:
+        succeeded = "succeeded" in event_type
+        with transaction.atomic():
+            order = Order.objects.select_for_update().get(
+                stripe_session_id=session.get("id")
+            )
+            order.status = "processing" if succeeded else "failed"
+            order.save(update_fields=["status"])
+            refresh_order_status(order)
 
-                payment_data["order"] = order
-                payment_data["status"] = (
-                    "succeeded" if "succeeded" in event_type else "failed"
+            Payment.objects.create(
+                **build_payment_data(
+                    session, order, "succeeded" if succeeded else "failed"
                 )
-                Payment.objects.create(**payment_data)
-
-        elif event_type == "checkout.session.expired":
-            try:
-                order = Order.objects.get(stripe_payment_intent_id=payment_intent_id)
-                order.status = "failed"
-                order.save()
-            except Order.DoesNotExist:
-                pass
+            )
 
-    except Exception as e:
-        return HttpResponse(status=status.HTTP_400_BAD_REQUEST)
+    elif event_type == "checkout.session.expired":
+        release_holds((session.get("metadata") or {}).get("hold_token"))
+        for order in Order.objects.filter(
+            stripe_session_id=session.get("id"), status="pending"
+        ):
+            order.status = "failed"
+            order.save(update_fields=["status"])
+            refresh_order_status(order)
 
 
 @csrf_exempt
@@ -303,12 +354,32 @@ def stripe_webhook(request):
     except stripe.error.SignatureVerificationError as e:
         return HttpResponse(status=status.HTTP_400_BAD_REQUEST)
 
-    event_type = event["type"]
-    session = event["data"]["object"]
-    fulfill_order(event_type, session)
+    # Store the verified event and return straight away; the
+    # process_stripe_events worker fulfills it. Stripe retries of an event we
+    # already have are ignored by the unique event_id.
+    StripeEvent.objects.bulk_create(
+        [
+            StripeEvent(
+                event_id=event["id"],
+                type=event["type"],
+                payload=json.loads(payload),
+                stripe_created=datetime.fromtimestamp(
+                    event["created"], tz=dt_timezone.utc
+                ),
+            )
+        ],
+        ignore_conflicts=True,
+    )
 
     return HttpResponse(status=200)
 
 
 def health_check(request):
     return JsonResponse({"status": "ok"})
+
+
+class RequestMetricsView(views.APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(get_route_metrics())
@@ -13,6 +13,7 @@ SECRET_KEY = env("DJANGO_SECRET_KEY")
 INSTALLED_APPS = [
     "artwork.apps.ArtworkConfig",
     "orders.apps.OrdersConfig",
+    "payments.apps.PaymentsConfig",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -25,6 +26,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "utils.request_metrics.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -79,6 +81,13 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# The catalogue version and cached responses must be shared by every process
+# in production; the in-process default is only for development and tests.
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -141,5 +150,12 @@ STRIPE_WEBHOOK_SECRET = env("STRIPE_WEBHOOK_SECRET")
 
 MAILGUN_API_KEY = env("MAILGUN_API_KEY")
 MAILGUN_DOMAIN = env("MAILGUN_DOMAIN")
+MAILGUN_API_URL = env("MAILGUN_API_URL", default="https://api.mailgun.net/v3")
+
+REQUEST_METRICS_ENABLED = env.bool("REQUEST_METRICS_ENABLED", default=False)
+
+# Re-export the static catalogue snapshot (see artwork.snapshots) whenever the
+# catalogue changes
+CATALOGUE_SNAPSHOT_ENABLED = env.bool("CATALOGUE_SNAPSHOT_ENABLED", default=False)
 
 SHIPPO_API_KEY = env("SHIPPO_API_KEY")
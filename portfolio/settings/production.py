@@ -13,6 +13,9 @@ STATIC_ROOT = env("STATIC_ROOT")
 MEDIA_URL = "/media/"
 MEDIA_ROOT = env("MEDIA_ROOT")
 
+# Required, e.g. redis://127.0.0.1:6379/0 (see artwork.checks.check_shared_cache)
+CACHES = {"default": env.cache("CACHE_URL")}
+
 SESSION_COOKIE_DOMAIN = DOMAIN
 SESSION_COOKIE_AGE = 1209600
 SESSION_COOKIE_HTTPONLY = True
@@ -0,0 +1,55 @@
+"""Model factories shared by the app test suites."""
+from decimal import Decimal
+
+from artwork.models import Artwork
+from orders.models import Order, Payment
+
+
+def create_artwork(**kwargs):
+    defaults = {
+        "title": "Test Artwork",
+        "width_inches": Decimal("12.0000"),
+        "height_inches": Decimal("16.0000"),
+        "price_cents": 50000,
+        "status": "available",
+        "medium": "oil_panel",
+        "category": "figure",
+    }
+    defaults.update(kwargs)
+    return Artwork.objects.create(**defaults)
+
+
+def create_order(**kwargs):
+    defaults = {
+        "stripe_session_id": "cs_test",
+        "stripe_payment_intent_id": "pi_test",
+        "customer_email": "buyer@example.com",
+        "shipping_rate_id": "shr_test",
+        "shipping_name": "Buyer",
+        "shipping_address_line1": "1 Main St",
+        "shipping_city": "Denver",
+        "shipping_postal_code": "80202",
+        "shipping_state": "CO",
+        "shipping_country": "US",
+        "subtotal_cents": 50000,
+        "shipping_cents": 1000,
+        "total_cents": 51000,
+        "currency": "usd",
+        "status": "processing",
+    }
+    defaults.update(kwargs)
+    return Order.objects.create(**defaults)
+
+
+def create_payment(order, **kwargs):
+    defaults = {
+        "stripe_payment_intent_id": order.stripe_payment_intent_id,
+        "subtotal_cents": order.subtotal_cents,
+        "shipping_cents": order.shipping_cents,
+        "shipping_stripe_id": order.shipping_rate_id,
+        "total_cents": order.total_cents,
+        "currency": order.currency,
+        "status": "succeeded",
+    }
+    defaults.update(kwargs)
+    return Payment.objects.create(order=order, **defaults)
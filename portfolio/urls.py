@@ -11,7 +11,13 @@ from artwork.views import (
     TestEmailSendView,
     PreviewEmailTemplateView,
 )
-from payments.views import CreateCheckoutSessionView, stripe_webhook, health_check
+from orders.views import OrderStatusView
+from payments.views import (
+    CreateCheckoutSessionView,
+    RequestMetricsView,
+    stripe_webhook,
+    health_check,
+)
 
 
 router = DefaultRouter()
@@ -27,8 +33,14 @@ urlpatterns = [
         CreateCheckoutSessionView.as_view(),
         name="create-checkout-session",
     ),
+    path(
+        "api/orders/<uuid:order_id>/status/",
+        OrderStatusView.as_view(),
+        name="order-status",
+    ),
     path("api/stripe-webhook/", stripe_webhook, name="stripe-webhook"),
     path("api/health/", health_check, name="health-check"),
+    path("api/metrics/", RequestMetricsView.as_view(), name="request-metrics"),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,200 @@
+import hashlib
+import hmac
+import json
+import statistics
+import time
+import tracemalloc
+import uuid
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from artwork.main_images import update_main_images
+from artwork.models import Artwork, Image
+from orders.models import Order, Shipment
+
+
+def seed_catalogue(
+    artworks=200, images_per_artwork=3, orders=20, shipments_per_order=1
+):
+    """
+    Bulk-insert a synthetic catalogue and return the created artworks.
+
+    bulk_create skips model signals, so no derivatives are generated and image
+    rows point at files that don't exist; dimensions are stored on the rows.
+    """
+    statuses = ["available", "coming_soon", "not_for_sale"]
+    created_artworks = Artwork.objects.bulk_create(
+        [
+            Artwork(
+                title=f"Benchmark Artwork {i}",
+                painting_number=i,
+                painting_year=2024,
+                width_inches=Decimal("12.0000"),
+                height_inches=Decimal("16.0000"),
+                price_cents=50000 + i,
+                status=statuses[i % len(statuses)],
+                medium="oil_panel",
+                category="figure",
+                sort_order=i,
+            )
+            for i in range(artworks)
+        ]
+    )
+
+    Image.objects.bulk_create(
+        [
+            Image(
+                artwork=artwork,
+                image=f"artwork/benchmark-{artwork.painting_number}-{j}.jpg",
+                width=3000,
+                height=4000,
+                is_main_image=j == 0,
+            )
+            for artwork in created_artworks
+            for j in range(images_per_artwork)
+        ]
+    )
+    update_main_images(artwork.pk for artwork in created_artworks)
+
+    created_orders = Order.objects.bulk_create(
+        [
+            Order(
+                stripe_session_id=f"cs_benchmark_{i}",
+                stripe_payment_intent_id=f"pi_benchmark_{i}",
+                customer_email=f"buyer{i}@example.com",
+                shipping_rate_id="shr_benchmark",
+                shipping_name="Benchmark Buyer",
+                shipping_address_line1="1 Main St",
+                shipping_city="Denver",
+                shipping_postal_code="80202",
+                shipping_state="CO",
+                shipping_country="US",
+                subtotal_cents=50000,
+                shipping_cents=1000,
+                total_cents=51000,
+                currency="usd",
+                status="shipped",
+            )
+            for i in range(orders)
+        ]
+    )
+    shipments = Shipment.objects.bulk_create(
+        [
+            Shipment(order=order, shipping_via="USPS", tracking_number=f"{i}-{j}")
+            for i, order in enumerate(created_orders)
+            for j in range(shipments_per_order)
+        ]
+    )
+
+    # Mark one artwork per order as sold and shipped
+    sold = []
+    for artwork, order in zip(reversed(created_artworks), created_orders):
+        artwork.status = "sold"
+        artwork.order = order
+        artwork.shipment = next(s for s in shipments if s.order_id == order.id)
+        sold.append(artwork)
+    Artwork.objects.bulk_update(sold, ["status", "order", "shipment"])
+
+    return created_artworks
+
+
+def sign_webhook_payload(payload, secret, timestamp=None):
+    timestamp = timestamp or int(time.time())
+    signature = hmac.new(
+        secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256
+    ).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def fake_checkout_event(product_ids, event_type="checkout.session.completed"):
+    session_id = f"cs_{uuid.uuid4().hex}"
+    return json.dumps(
+        {
+            "id": f"evt_{uuid.uuid4().hex}",
+            "object": "event",
+            "type": event_type,
+            "created": int(time.time()),
+            "data": {
+                "object": {
+                    "id": session_id,
+                    "object": "checkout.session",
+                    "payment_intent": f"pi_{uuid.uuid4().hex}",
+                    "payment_status": "paid",
+                    "metadata": {"product_ids": ",".join(map(str, product_ids))},
+                    "customer_details": {"email": "buyer@example.com"},
+                    "shipping_details": {
+                        "name": "Benchmark Buyer",
+                        "address": {
+                            "line1": "1 Main St",
+                            "city": "Denver",
+                            "postal_code": "80202",
+                            "state": "CO",
+                            "country": "US",
+                        },
+                    },
+                    "shipping_cost": {"shipping_rate": "shr_benchmark"},
+                    "total_details": {"amount_shipping": 1000},
+                    "amount_subtotal": 50000,
+                    "amount_total": 51000,
+                    "currency": "usd",
+                }
+            },
+        }
+    )
+
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def measure(func, iterations=20, setup=None, teardown=None, trace_memory=True):
+    """
+    Run `func` repeatedly and summarise latency, CPU time, SQL queries and
+    memory.
+
+    `setup` and `teardown` run around each iteration, outside the measurement.
+    tracemalloc slows everything down by a roughly constant factor, so compare
+    latencies only between runs with the same `trace_memory` setting.
+    """
+    latencies = []
+    cpu_times = []
+    queries = []
+    peaks = []
+    for _ in range(iterations):
+        if setup:
+            setup()
+
+        if trace_memory:
+            tracemalloc.start()
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            cpu_start = time.process_time()
+            func()
+            cpu_times.append((time.process_time() - cpu_start) * 1000)
+            latencies.append((time.perf_counter() - start) * 1000)
+        if trace_memory:
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        queries.append(len(context.captured_queries))
+
+        if teardown:
+            teardown()
+
+    return {
+        "iterations": iterations,
+        "latency_ms": {
+            "min": round(min(latencies), 3),
+            "median": round(statistics.median(latencies), 3),
+            "p95": round(_percentile(latencies, 95), 3),
+            "max": round(max(latencies), 3),
+        },
+        "cpu_ms": {"median": round(statistics.median(cpu_times), 3)},
+        "queries": {"median": statistics.median(queries), "max": max(queries)},
+        "peak_memory_kb": (
+            round(statistics.median(peaks) / 1024, 1) if peaks else None
+        ),
+    }
@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from orders.models import OutboundEmail
+from .mailgun import send_mailgun_email
+
+MAX_ATTEMPTS = 8
+BASE_RETRY_DELAY = timedelta(seconds=30)
+MAX_RETRY_DELAY = timedelta(hours=1)
+
+
+def enqueue_email(idempotency_key, subject, message, to_email, html=None):
+    """
+    Queue an email to be sent by the `send_emails` worker.
+
+    Runs inside the caller's transaction, so the email is only sent if the
+    surrounding changes commit. Queuing the same key twice is a no-op; it is a
+    single INSERT ... ON CONFLICT DO NOTHING either way.
+    """
+    OutboundEmail.objects.bulk_create(
+        [
+            OutboundEmail(
+                idempotency_key=idempotency_key,
+                subject=subject,
+                text=message,
+                to_email=to_email,
+                html=html,
+            )
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def retry_delay(attempts):
+    return min(BASE_RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def deliver_email(email):
+    try:
+        send_mailgun_email(
+            subject=email.subject,
+            message=email.text,
+            to_email=email.to_email,
+            html=email.html,
+        )
+    except Exception as e:
+        email.attempts += 1
+        email.last_error = str(e)
+        if email.attempts >= MAX_ATTEMPTS:
+            email.status = "failed"
+        else:
+            email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+        email.save(
+            update_fields=["attempts", "last_error", "status", "next_attempt_at"]
+        )
+        return False
+
+    email.attempts += 1
+    email.status = "sent"
+    email.sent_at = timezone.now()
+    email.save(update_fields=["attempts", "status", "sent_at"])
+    return True
+
+
+def deliver_due_emails(limit=50):
+    """
+    Send up to `limit` due emails and return `(sent, failed)` counts.
+
+    Each email is locked while it is being sent, so concurrent workers skip it
+    instead of sending it twice.
+    """
+    sent = failed = 0
+    for _ in range(limit):
+        with transaction.atomic():
+            email = (
+                OutboundEmail.objects.select_for_update(skip_locked=True)
+                .filter(status="pending", next_attempt_at__lte=timezone.now())
+                .order_by("next_attempt_at", "id")
+                .first()
+            )
+            if email is None:
+                break
+            if deliver_email(email):
+                sent += 1
+            else:
+                failed += 1
+    return sent, failed
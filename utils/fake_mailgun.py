@@ -0,0 +1,99 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+DROP = "drop"
+
+
+class FakeMailgunServer:
+    """
+    Minimal local stand-in for the Mailgun messages API.
+
+    Point MAILGUN_API_URL at `server.url` and every posted message is recorded
+    in `server.messages`, with `server.connections` counting TCP connections.
+    Queue status codes in `server.responses` to make the next requests fail,
+    e.g. `server.responses = [503, 429]`, and set `server.retry_after` to send
+    a Retry-After header with them. A queued `DROP` accepts the message and
+    then closes the connection without answering.
+
+        with FakeMailgunServer() as server, override_settings(
+            MAILGUN_API_URL=server.url
+        ):
+            ...
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.responses = []
+        self.retry_after = None
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v3"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so clients can reuse connections like with Mailgun
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length).decode()
+
+                with server._lock:
+                    server.requests += 1
+                    status = server.responses.pop(0) if server.responses else 200
+                    if status in (200, DROP):
+                        fields = parse_qs(body)
+                        message = {key: values[0] for key, values in fields.items()}
+                        message["path"] = self.path
+                        server.messages.append(message)
+
+                if status == DROP:
+                    self.close_connection = True
+                    return
+
+                payload = b'{"id": "<fake@mailgun>", "message": "Queued. Thank you."}'
+                if status != 200:
+                    payload = b'{"message": "Fake failure"}'
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                if status != 200 and server.retry_after is not None:
+                    self.send_header("Retry-After", str(server.retry_after))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
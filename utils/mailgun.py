@@ -1,9 +1,97 @@
+import logging
+import threading
+import time
+
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) seconds. A hung provider must not hold a worker indefinitely.
+TIMEOUT = (3.05, 10)
+
+# Longest Retry-After honoured in process. The outbox holds the email's row
+# lock while sending, so longer waits are left to its own backoff.
+MAX_RETRY_AFTER = 5
+
+
+class MailgunRetry(Retry):
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, MAX_RETRY_AFTER)
+
+
+# Only retry what Mailgun cannot have accepted: connection failures, 429 and
+# 503. After a read error, a dropped connection or a 500/502/504 the message
+# may have gone out, so the error is raised and the outbox tries again later.
+# Mailgun has no idempotency key, so delivery is at-least-once: in those
+# cases the customer can get the email twice.
+RETRY = MailgunRetry(
+    total=3,
+    read=0,
+    other=0,
+    backoff_factor=0.5,
+    status_forcelist=(429, 503),
+    allowed_methods=frozenset(["POST"]),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+_session = None
+_lock = threading.Lock()
+_metrics = {
+    "requests": 0,
+    "errors": 0,
+    "total_seconds": 0.0,
+    "max_seconds": 0.0,
+}
+
+
+def get_session():
+    """
+    Return the process-wide Mailgun session, creating it on first use.
+
+    Reusing one session keeps connections to Mailgun alive between emails, so
+    bulk sends don't pay a TCP+TLS handshake per message. It is created lazily
+    so each gunicorn worker gets its own after forking.
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=10, max_retries=RETRY
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def get_mailgun_metrics():
+    with _lock:
+        metrics = dict(_metrics)
+    metrics["average_seconds"] = (
+        metrics["total_seconds"] / metrics["requests"] if metrics["requests"] else 0.0
+    )
+    return metrics
+
+
+def _record(duration, error):
+    with _lock:
+        _metrics["requests"] += 1
+        _metrics["errors"] += int(error)
+        _metrics["total_seconds"] += duration
+        _metrics["max_seconds"] = max(_metrics["max_seconds"], duration)
 
 
 def send_mailgun_email(subject, message, to_email, html=None):
-    api_url = f"https://api.mailgun.net/v3/{settings.MAILGUN_DOMAIN}/messages"
+    api_url = f"{settings.MAILGUN_API_URL}/{settings.MAILGUN_DOMAIN}/messages"
 
     auth = ("api", settings.MAILGUN_API_KEY)
     data = {
@@ -16,7 +104,15 @@ def send_mailgun_email(subject, message, to_email, html=None):
     if html:
         data["html"] = html
 
-    response = requests.post(api_url, auth=auth, data=data)
+    start = time.perf_counter()
+    try:
+        response = get_session().post(api_url, auth=auth, data=data, timeout=TIMEOUT)
+    except requests.RequestException:
+        _record(time.perf_counter() - start, error=True)
+        raise
+    duration = time.perf_counter() - start
+    _record(duration, error=response.status_code != 200)
+    logger.debug("Mailgun responded %s in %.3fs", response.status_code, duration)
 
     if response.status_code == 200:
         return response.json()
@@ -1,49 +1,104 @@
 from django.conf import settings
-from django.template.loader import render_to_string
+from django.db.models import Prefetch, prefetch_related_objects
+from django.template.loader import get_template
 from django.template.defaultfilters import register
 
+from artwork.models import Image
 from orders.templatetags.orders_tags import cents_to_dollars, get_item
-from .mailgun import send_mailgun_email
+from .email_outbox import enqueue_email
 
 register.filter("cents_to_dollars", cents_to_dollars)
 register.filter("get_item", get_item)
 
+# Everything the email templates read from an order, loaded in two queries
+# (artworks, then their images main-first) however many artworks there are.
+ORDER_EMAIL_PREFETCH = [
+    "artworks",
+    Prefetch(
+        "artworks__images", queryset=Image.objects.order_by("-is_main_image", "id")
+    ),
+]
 
-def send_order_email(order, template_name, subject, shipment=None):
-    artworks = order.artworks.all()
+
+def build_order_email_context(order, shipment=None, artworks=None):
+    # Callers that already hold the order's artworks can pass them in to skip
+    # fetching them again; only their images are loaded then.
+    if artworks is None:
+        # No-op for orders that were already loaded with ORDER_EMAIL_PREFETCH
+        prefetch_related_objects([order], *ORDER_EMAIL_PREFETCH)
+        artworks = order.artworks.all()
+    else:
+        prefetch_related_objects(
+            artworks,
+            Prefetch("images", queryset=Image.objects.order_by("-is_main_image", "id")),
+        )
     image_urls = {}
     for artwork in artworks:
-        if artwork.images.exists():
-            image_urls[artwork.id] = (
-                f"{settings.BASE_URL}/media/{artwork.images.first().image}"
-            )
+        image = artwork.get_main_image()
+        if image is not None:
+            image_urls[artwork.id] = f"{settings.BASE_URL}/media/{image.image}"
 
     context = {
         "order": order,
         "artworks": artworks,
         "image_urls": image_urls,
+        "shipment_artworks": [],
     }
 
     if shipment is not None:
         context["shipment"] = shipment
+        # One query; a shipment's artworks all belong to the order, so their
+        # images are already in image_urls.
+        context["shipment_artworks"] = list(shipment.artworks.all())
+
+    return context
+
+
+def render_order_email(template_name, context):
+    text_content = get_template(f"emails/{template_name}.txt").render(context)
+    html_content = get_template(f"emails/{template_name}.html").render(context)
+    return text_content, html_content
+
+
+def render_order_emails(orders, template_name):
+    """
+    Render `template_name` for many orders at once, e.g. for resends.
 
-    text_content = render_to_string(f"emails/{template_name}.txt", context)
-    html_content = render_to_string(f"emails/{template_name}.html", context)
+    `orders` may be a queryset or a list of orders; the artworks and images for
+    all of them are fetched together. Returns `(order, text, html)` tuples.
+    """
+    orders = list(orders)
+    prefetch_related_objects(orders, *ORDER_EMAIL_PREFETCH)
+    return [
+        (order, *render_order_email(template_name, build_order_email_context(order)))
+        for order in orders
+    ]
 
-    send_mailgun_email(
+
+def send_order_email(order, template_name, subject, shipment=None, artworks=None):
+    # Emails are queued in the caller's transaction and sent by `send_emails`
+    context = build_order_email_context(order, shipment, artworks)
+    text_content, html_content = render_order_email(template_name, context)
+
+    idempotency_key = f"order:{order.pk}:{template_name}"
+    if shipment is not None:
+        idempotency_key = f"shipment:{shipment.pk}:{template_name}"
+
+    enqueue_email(
+        idempotency_key=idempotency_key,
         subject=subject,
         message=text_content,
         to_email=(
-            settings.TESTING_EMAIL_RECIPIENT
-            if settings.DEBUG
-            else order.customer_email
+            settings.TESTING_EMAIL_RECIPIENT if settings.DEBUG else order.customer_email
         ),
         html=html_content,
     )
 
 
-def send_order_confirmation(order):
-    send_order_email(order, "order_confirmation", "Your order has been received!")
+def send_order_confirmation(order, artworks=None):
+    send_order_email(
+        order, "order_confirmation", "Your order has been received!", artworks=artworks
+    )
 
 
 def send_shipment_started(order, shipment):
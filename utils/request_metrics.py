@@ -0,0 +1,189 @@
+import re
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework import serializers
+
+# Upper bounds in milliseconds; the last bucket catches everything slower.
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+SQL_PREVIEW_LENGTH = 500
+
+# Router URLs are regexes, e.g. "^artworks/(?P<pk>[^/.]+)/$"
+ROUTE_ANCHORS = re.compile(r"\^|\$|\\Z")
+ROUTE_GROUP = re.compile(r"\(\?P<(\w+)>[^)]*\)")
+
+_current = ContextVar("request_metrics", default=None)
+_lock = threading.Lock()
+_routes = {}
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.query_count = 0
+        self.sql_ms = 0.0
+        self.slowest_sql_ms = 0.0
+        self.slowest_sql = None
+        self.timings = {}
+        self.active = set()
+
+    def record_query(self, sql, duration_ms):
+        self.query_count += 1
+        self.sql_ms += duration_ms
+        if duration_ms > self.slowest_sql_ms:
+            self.slowest_sql_ms = duration_ms
+            self.slowest_sql = sql
+
+    def add_timing(self, name, duration_ms):
+        self.timings[name] = self.timings.get(name, 0.0) + duration_ms
+
+
+@contextmanager
+def record_timing(name):
+    """
+    Time a block of work (e.g. serialization) for the current request.
+
+    Does nothing unless RequestMetricsMiddleware is active. Nested blocks
+    with the same name are only counted once.
+    """
+    metrics = _current.get()
+    if metrics is None or name in metrics.active:
+        yield
+        return
+
+    metrics.active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.active.discard(name)
+        metrics.add_timing(name, (time.perf_counter() - start) * 1000)
+
+
+class TimedSerializerMixin:
+    @property
+    def data(self):
+        with record_timing("serializer"):
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+def _query_wrapper(metrics):
+    def wrapper(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            metrics.record_query(sql, (time.perf_counter() - start) * 1000)
+
+    return wrapper
+
+
+def _observe(route, duration_ms, metrics):
+    with _lock:
+        stats = _routes.setdefault(
+            route,
+            {
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "queries": 0,
+                "max_queries": 0,
+                "sql_ms": 0.0,
+                "slowest_sql_ms": 0.0,
+                "slowest_sql": None,
+                "buckets": [0] * (len(BUCKETS_MS) + 1),
+            },
+        )
+        stats["count"] += 1
+        stats["total_ms"] += duration_ms
+        stats["max_ms"] = max(stats["max_ms"], duration_ms)
+        stats["queries"] += metrics.query_count
+        stats["max_queries"] = max(stats["max_queries"], metrics.query_count)
+        stats["sql_ms"] += metrics.sql_ms
+        if metrics.slowest_sql_ms > stats["slowest_sql_ms"]:
+            stats["slowest_sql_ms"] = metrics.slowest_sql_ms
+            stats["slowest_sql"] = metrics.slowest_sql[:SQL_PREVIEW_LENGTH]
+        index = next(
+            (i for i, bound in enumerate(BUCKETS_MS) if duration_ms <= bound),
+            len(BUCKETS_MS),
+        )
+        stats["buckets"][index] += 1
+
+
+def get_route_metrics():
+    with _lock:
+        routes = {route: dict(stats) for route, stats in _routes.items()}
+
+    labels = [f"<={bound}ms" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+    for stats in routes.values():
+        count = stats["count"]
+        stats["histogram"] = dict(zip(labels, stats.pop("buckets")))
+        stats["average_ms"] = round(stats["total_ms"] / count, 3)
+        stats["average_queries"] = round(stats["queries"] / count, 2)
+        stats["average_sql_ms"] = round(stats["sql_ms"] / count, 3)
+    return {"buckets_ms": list(BUCKETS_MS), "routes": routes}
+
+
+def reset_route_metrics():
+    with _lock:
+        _routes.clear()
+
+
+def _route_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    # Label regex routes like path() ones: /api/artworks/<pk>/
+    route = ROUTE_GROUP.sub(r"<\1>", ROUTE_ANCHORS.sub("", match.route))
+    return f"{request.method} /{route}"
+
+
+class RequestMetricsMiddleware:
+    """
+    Record per-request SQL query count and time, the slowest query and any
+    `record_timing` blocks. Report them in a `Server-Timing` header and
+    aggregate per-route latency histograms.
+
+    Enabled with the REQUEST_METRICS_ENABLED setting.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_METRICS_ENABLED", False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                wrapper = _query_wrapper(metrics)
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(wrapper))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        _observe(_route_name(request), total_ms, metrics)
+
+        entries = [
+            f'db;dur={metrics.sql_ms:.2f};desc="{metrics.query_count} queries"',
+            f"db-slowest;dur={metrics.slowest_sql_ms:.2f}",
+        ]
+        entries += [
+            f"{name};dur={duration:.2f}" for name, duration in metrics.timings.items()
+        ]
+        entries.append(f"total;dur={total_ms:.2f}")
+        response["Server-Timing"] = ", ".join(entries)
+        return response